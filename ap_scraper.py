@@ -1,17 +1,27 @@
-import requests
-import time
-import csv
-import os
 import itertools
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+
+import engine
+from keyspace import Block
+from sampling import StratifiedSample
+from schema import Schema, number, rank, text
 
 BASE_URL        = "https://www.results.manabadi.co.in/2025/AP/EAPCET/Namewise/APEAPCETResults2025.aspx"
 ALL_FILE        = "ap_all_students.csv"
 QUALIFIED_FILE  = "ap_qualified_ranked.csv"
-CHECKPOINT_FILE = "ap_checkpoint.txt"
-MAX_WORKERS     = 50
-SAVE_EVERY      = 500
+CHECKPOINT_FILE = "ap_checkpoint.bitmap"
+SKIPPED_FILE    = "ap_skipped_ranges.csv"
+CAPTURE_DIR     = "ap_capture"
+UNRESOLVED_FILE = "ap_unresolved.csv"
+DB_FILE         = "ap_all_students.db"
+METRICS_FILE    = "ap_metrics.json"
+TOPOLOGY_FILE   = "ap_topology.json"
+CHANGES_FILE    = "ap_changes.csv"
+REFRESH_LOG     = "ap_refresh_log.tsv"
+INDEX_FILE      = "ap_all_students.idx"
+MISS_CACHE      = "ap_misses.tsv"
+TRACE_FILE      = "ap_trace.folded"
+SEGMENT_DIR     = "ap_all_students.segments"
+MAX_CONCURRENT  = 50
 SAMPLE_MODE     = True
 SAMPLE_SIZE     = 2000
 
@@ -24,6 +34,17 @@ STREAM_PREFIX = '55'
 STREAM_CODES  = ['01','02','03','04','05','06','07']
 SEQ_START     = 1
 SEQ_END       = 150
+CENTER        = slice(2, 6)     # ticket characters naming the center (CCCC), for --query center
+
+# Close a (center, stream) block after this many consecutive misses past its
+# last hit. None = probe every sequence number up to SEQ_END.
+MISS_RUN      = 20
+
+# Searched by --discover, which writes ap_topology.json — used in place of
+# ALIVE_CENTERS / STREAM_CODES / SEQ_END while it exists.
+CANDIDATE_CENTERS = range(100, 1200)
+CANDIDATE_STREAMS = [f"{s:02d}" for s in range(1, 10)]
+SEQ_LIMIT         = 400
 
 ALIVE_CENTERS = [
     152,153,154,155,156,157,158,159,160,161,163,164,165,166,167,169,170,171,
@@ -53,178 +74,74 @@ ALIVE_CENTERS = [
     1085,1086,1087,1088,1089,1090,1091,1092,1093,1094,1095,1096,1097,1098
 ]
 
-FIELDS = ['Hall Ticket No', 'Name', 'Score', 'Status', 'Rank']
-
-def load_checkpoint():
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, 'r') as f:
-            val = f.read().strip()
-            if val.isdigit():
-                print(f"[RESUME] Resuming from index {val}")
-                return int(val)
-    return 0
-
-def save_checkpoint(index):
-    with open(CHECKPOINT_FILE, 'w') as f:
-        f.write(str(index))
-
-def init_csv(filepath):
-    if not os.path.exists(filepath):
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            csv.DictWriter(f, fieldnames=FIELDS).writeheader()
-        print(f"[INIT] Created {filepath}")
-    else:
-        print(f"[INIT] Appending to existing {filepath}")
-
-def flush_to_csv(filepath, records):
-    with open(filepath, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDS)
-        writer.writerows(records)
-
-def parse_response(data_str):
-    if '|' not in data_str or 'Referral' in data_str:
-        return None
-    parts = data_str.strip().split('|')
-    if len(parts) < 10:
-        return None
-    try:
-        score_str = parts[7].strip().replace('\u2026', '').replace('...', '')
-        return {
-            'Hall Ticket No': parts[0].strip(),
-            'Name':           parts[1].strip(),
-            'Score':          float(score_str) if score_str else None,
-            'Status':         parts[9].strip(),
-            'Rank':           int(parts[8].strip()) if parts[8].strip() not in ['-', ''] else None
-        }
-    except (ValueError, IndexError):
-        return None
-
-def scrape_one(htno):
-    try:
-        resp = requests.get(BASE_URL, params={'htno': htno}, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-        return htno, parse_response(resp.text.strip())
-    except Exception:
-        return htno, None
-
-def build_full_ticket_list():
-    tickets = []
-    for center, stream, seq in itertools.product(
-        ALIVE_CENTERS, STREAM_CODES, range(SEQ_START, SEQ_END + 1)
-    ):
-        tickets.append(f"{STREAM_PREFIX}{center:04d}{stream}{seq:04d}")
-    return tickets
-
-def build_sample_tickets():
-    sample_centers = ALIVE_CENTERS[:30]
-    tickets = []
-    for center, stream, seq in itertools.product(
-        sample_centers, STREAM_CODES, range(SEQ_START, SEQ_END + 1)
-    ):
-        tickets.append(f"{STREAM_PREFIX}{center:04d}{stream}{seq:04d}")
-    return tickets[:SAMPLE_SIZE]
-
-def run_scraper():
-    all_tickets = build_full_ticket_list()
-    total_full  = len(all_tickets)
-
-    if SAMPLE_MODE:
-        tickets_to_run = build_sample_tickets()
-        print(f"[SAMPLE MODE] Running {len(tickets_to_run):,} tickets")
-        print(f"              from full keyspace of {total_full:,}")
-        print(f"              Set SAMPLE_MODE = False for full scrape\n")
-    else:
-        start_index    = load_checkpoint()
-        tickets_to_run = all_tickets[start_index:]
-        print(f"[FULL MODE] {len(tickets_to_run):,} tickets remaining of {total_full:,}\n")
-
-    init_csv(ALL_FILE)
-
-    buffer      = []
-    all_records = []
-    lock        = Lock()
-    found       = 0
-    processed   = 0
-    start_wall  = time.time()
-
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_idx = {
-            executor.submit(scrape_one, ht): i
-            for i, ht in enumerate(tickets_to_run)
-        }
-
-        for future in as_completed(future_to_idx):
-            idx          = future_to_idx[future]
-            htno, record = future.result()
-            processed   += 1
-
-            if record:
-                with lock:
-                    buffer.append(record)
-                    all_records.append(record)
-                    found += 1
-
-                    if len(buffer) >= SAVE_EVERY:
-                        flush_to_csv(ALL_FILE, buffer)
-                        if not SAMPLE_MODE:
-                            save_checkpoint(idx)
-                        elapsed = time.time() - start_wall
-                        rate    = processed / elapsed
-                        eta_hrs = (len(tickets_to_run) - processed) / rate / 3600
-                        print(
-                            f"  [SAVE] {found} students | "
-                            f"{processed:,} processed | "
-                            f"{rate:.1f} req/s | "
-                            f"ETA: {eta_hrs:.1f} hrs"
-                        )
-                        buffer.clear()
-
-    if buffer:
-        flush_to_csv(ALL_FILE, buffer)
-        print(f"  [FINAL FLUSH] {len(buffer)} records written")
-
-    wall_time = time.time() - start_wall
-
-    qualified = [r for r in all_records if r['Status'].lower() == 'qualified']
-    qualified_sorted = sorted(
-        qualified,
-        key=lambda x: x['Rank'] if x['Rank'] is not None else float('inf')
-    )
-
-    with open(QUALIFIED_FILE, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=FIELDS)
-        writer.writeheader()
-        writer.writerows(qualified_sorted)
-
-    print("\n" + "=" * 65)
-    print("SCRAPE SUMMARY")
-    print("=" * 65)
-    print(f"  Total tickets processed : {processed:,}")
-    print(f"  Total students found    : {found:,}")
-    print(f"  Qualified students      : {len(qualified_sorted):,}")
-    print(f"  Not Qualified           : {found - len(qualified_sorted):,}")
-    print(f"  Time taken              : {wall_time:.1f}s")
-    print(f"  Avg speed               : {processed / wall_time:.1f} req/s")
-    print(f"\n  Saved → {ALL_FILE}")
-    print(f"  Saved → {QUALIFIED_FILE}")
-
-    print(f"\nTOP 10 QUALIFIED STUDENTS:")
-    print(f"{'Rank':<8} {'Hall Ticket':<15} {'Name':<35} {'Score'}")
-    print("-" * 75)
-    for r in qualified_sorted[:10]:
-        print(
-            f"  {str(r['Rank']):<6} "
-            f"{r['Hall Ticket No']:<15} "
-            f"{r['Name']:<35} "
-            f"{r['Score']}"
-        )
-
-    if SAMPLE_MODE:
-        print(f"\n{'='*65}")
-        print(f"  SAMPLE COMPLETE — results look good?")
-        print(f"  Set SAMPLE_MODE = False and run again for full scrape")
-        full_eta = total_full / (processed / wall_time) / 3600
-        print(f"  Estimated full scrape: {full_eta:.1f} hours for {total_full:,} tickets")
-        print(f"{'='*65}")
-
-run_scraper()
+SCHEMA = Schema(
+    width   = 10,
+    rejects = ('Referral',),
+    fields  = {
+        'Hall Ticket No': (0, text),
+        'Name':           (1, text),
+        'Score':          (7, number),
+        'Status':         (9, text),
+        'Rank':           (8, rank),
+    },
+)
+
+# A Status containing one of these is a result the site has not finished
+# publishing (no rank yet); --refresh re-fetches those rows.
+PENDING_STATUS = ('not available',)
+
+def build_blocks():
+    """One block per (center, stream) run, in scrape order."""
+    return [
+        Block(f"{STREAM_PREFIX}{center:04d}{stream}", SEQ_START, SEQ_END, 4)
+        for center, stream in itertools.product(ALIVE_CENTERS, STREAM_CODES)
+    ]
+
+def build_candidates():
+    """Every candidate (center, stream) block, for --discover."""
+    return [
+        Block(f"{STREAM_PREFIX}{center:04d}{stream}", SEQ_START, SEQ_LIMIT, 4)
+        for center, stream in itertools.product(CANDIDATE_CENTERS, CANDIDATE_STREAMS)
+    ]
+
+def build_sample_tickets(keyspace):
+    """Random tickets from every (block group, sequence band) stratum."""
+    return StratifiedSample(keyspace, SAMPLE_SIZE)
+
+def is_qualified(record):
+    return record['Status'].lower() == 'qualified'
+
+PROFILE = engine.ExamProfile(
+    name                 = 'AP EAPCET',
+    script               = 'ap_scraper.py',
+    url                  = BASE_URL,
+    headers              = HEADERS,
+    schema               = SCHEMA,
+    qualifies            = is_qualified,
+    build_blocks         = build_blocks,
+    build_sample_tickets = build_sample_tickets,
+    build_candidates     = build_candidates,
+    all_file             = ALL_FILE,
+    qualified_file       = QUALIFIED_FILE,
+    checkpoint_file      = CHECKPOINT_FILE,
+    skipped_file         = SKIPPED_FILE,
+    capture_dir          = CAPTURE_DIR,
+    unresolved_file      = UNRESOLVED_FILE,
+    db_file              = DB_FILE,
+    metrics_file         = METRICS_FILE,
+    topology_file        = TOPOLOGY_FILE,
+    changes_file         = CHANGES_FILE,
+    refresh_log          = REFRESH_LOG,
+    index_file           = INDEX_FILE,
+    miss_cache           = MISS_CACHE,
+    trace_file           = TRACE_FILE,
+    segment_dir          = SEGMENT_DIR,
+    center               = CENTER,
+    pending              = PENDING_STATUS,
+    max_concurrent       = MAX_CONCURRENT,
+    miss_run             = MISS_RUN,
+    sample_mode          = SAMPLE_MODE,
+)
+
+if __name__ == "__main__":
+    engine.main(PROFILE)
@@ -0,0 +1,198 @@
+import argparse
+import asyncio
+import copy
+import contextlib
+import csv
+import io
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+# ── END-TO-END THROUGHPUT BENCHMARK ───────────────────────────────────────────
+# Starts mock_server.py locally, runs each exam's real scrape pipeline against
+# it in a fresh process and reports req/s, p50/p99 latency, peak RSS and hit
+# accuracy, so a change to concurrency or client code can be judged before a
+# six-hour production run.
+#
+#   python bench.py                                  # all exams, defaults
+#   python bench.py --exams bipc --tickets 50000 --latency 80 --error-rate 0.02
+#   python bench.py --concurrency 200 --json bench_output.json
+#   python bench.py --error-rate 0.05 --fixed-window  # compare against AIMD
+
+HERE         = os.path.dirname(os.path.abspath(__file__))
+EXAM_MODULES = {'ts': 'scraper', 'ap': 'ap_scraper', 'bipc': 'bipc_scraper'}
+OUTPUT_ATTRS = ('all_file', 'qualified_file', 'checkpoint_file', 'skipped_file', 'capture_dir',
+                'unresolved_file', 'db_file', 'metrics_file', 'topology_file',
+                'changes_file', 'refresh_log', 'index_file', 'miss_cache', 'trace_file',
+                'segment_dir')
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+# ── CHILD: ONE EXAM ───────────────────────────────────────────────────────────
+def run_child(args):
+    import importlib
+    import aiohttp
+    import engine
+    import mock_server
+    from keyspace import Keyspace
+
+    module  = importlib.import_module(EXAM_MODULES[args.child])
+    profile = copy.copy(module.PROFILE)
+    blocks  = list(Keyspace(module.build_blocks())[:args.tickets].blocks())
+
+    profile.build_blocks = lambda: blocks
+    profile.url          = args.url_base + urlsplit(profile.url).path
+    profile.sample_mode  = False
+    if args.concurrency:
+        profile.max_concurrent = args.concurrency
+    workdir = tempfile.mkdtemp(prefix=f"bench_{args.child}_")
+    for attr in OUTPUT_ATTRS:
+        setattr(profile, attr, os.path.join(workdir, os.path.basename(getattr(profile, attr))))
+
+    latencies = []
+    errors    = [0]     # HTTP 4xx/5xx responses
+    failed    = [0]     # requests that got no response at all
+
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        latencies.append(time.perf_counter() - ctx.start)
+        if params.response.status >= 400:      # e.g. the mock's --error-rate 500s
+            errors[0] += 1
+
+    async def on_request_exception(session, ctx, params):
+        failed[0] += 1
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        source, planned, total_full, done = engine.select_tickets(profile)
+        start = time.perf_counter()
+        asyncio.run(engine.run_async_scraper(
+            profile, source, planned, total_full, done, trace_configs=[trace],
+            adaptive=not args.fixed_window,
+        ))
+        wall = time.perf_counter() - start
+        exam = mock_server.build_exams()[args.child].load()
+
+    with open(profile.all_file, newline='', encoding='utf-8') as f:
+        found = {row['Hall Ticket No'] for row in csv.DictReader(f)}
+    shutil.rmtree(workdir, ignore_errors=True)
+    expected = {ht for block in blocks for ht in block.tickets() if exam.lookup(ht)}
+
+    latencies.sort()
+    requests = len(latencies) + failed[0]
+    print(json.dumps({
+        'exam':        args.child,
+        'tickets':     sum(len(b) for b in blocks),
+        'requests':    requests,
+        'errors':      errors[0] + failed[0],
+        'wall_s':      round(wall, 2),
+        'req_per_s':   round(requests / wall, 1) if wall else 0.0,
+        'p50_ms':      round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms':      round(percentile(latencies, 0.99) * 1000, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'expected':    len(expected),
+        'found':       len(found & expected),
+        'spurious':    len(found - expected),
+        'accuracy':    round(len(found & expected) / len(expected), 4) if expected else 1.0,
+    }))
+
+# ── PARENT: SERVER + REPORT ───────────────────────────────────────────────────
+def wait_for_port(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection((host, port), timeout=1):
+            return
+        time.sleep(0.2)
+    raise SystemExit(f"[BENCH] Mock server did not come up on {host}:{port}")
+
+def print_report(rows):
+    print("\n" + "=" * 100)
+    print("BENCHMARK RESULTS")
+    print("=" * 100)
+    print(f"{'Exam':<6} {'Tickets':>8} {'Requests':>9} {'Errors':>7} {'Wall s':>8} "
+          f"{'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'Found':>13} {'Accuracy':>9}")
+    print("-" * 100)
+    for r in rows:
+        print(f"{r['exam']:<6} {r['tickets']:>8,} {r['requests']:>9,} {r['errors']:>7,} "
+              f"{r['wall_s']:>8.1f} {r['req_per_s']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['peak_rss_mb']:>8.1f} "
+              f"{r['found']:>6,}/{r['expected']:<6,} {r['accuracy']:>8.2%}")
+
+def run_parent(args):
+    base   = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, 'mock_server.py', '--port', str(args.port),
+         '--latency', str(args.latency), '--jitter', str(args.jitter),
+         '--error-rate', str(args.error_rate), '--deny-rate', str(args.deny_rate),
+         '--max-connections', str(args.max_connections)],
+        cwd=HERE,
+    )
+    rows = []
+    try:
+        wait_for_port('127.0.0.1', args.port)
+        for exam in args.exams:
+            print(f"[BENCH] {exam}: {args.tickets:,} tickets against {base}")
+            cmd = [sys.executable, os.path.abspath(__file__), '--child', exam,
+                   '--url-base', base, '--tickets', str(args.tickets)]
+            if args.concurrency:
+                cmd += ['--concurrency', str(args.concurrency)]
+            if args.fixed_window:
+                cmd += ['--fixed-window']
+            out = subprocess.run(cmd, cwd=HERE, capture_output=True, text=True)
+            if out.returncode != 0:
+                print(out.stderr)
+                raise SystemExit(f"[BENCH] {exam} run failed")
+            rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print_report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n  Saved → {args.json}")
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Throughput benchmark against the local mock server")
+    parser.add_argument('--exams', nargs='+', choices=sorted(EXAM_MODULES),
+                        default=['ts', 'ap', 'bipc'])
+    parser.add_argument('--tickets', type=int, default=20000,
+                        help="keyspace prefix to scrape per exam (default 20000)")
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help="override each profile's MAX_CONCURRENT")
+    parser.add_argument('--fixed-window', action='store_true',
+                        help="disable the adaptive (AIMD) window, as in the scrapers")
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=40.0)
+    parser.add_argument('--jitter', type=float, default=15.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--deny-rate', type=float, default=0.0)
+    parser.add_argument('--max-connections', type=int, default=200)
+    parser.add_argument('--json', metavar='FILE', help="also write the results as JSON")
+    parser.add_argument('--child', choices=sorted(EXAM_MODULES), help=argparse.SUPPRESS)
+    parser.add_argument('--url-base', help=argparse.SUPPRESS)
+    return parser
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
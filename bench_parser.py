@@ -0,0 +1,65 @@
+import argparse
+import csv
+import time
+
+import ap_scraper
+import bipc_scraper
+import mock_server
+import scraper
+
+# ── PARSER MICROBENCHMARK ─────────────────────────────────────────────────────
+# Parses the BIPC corpus (every row of bipc_all_students.csv, rendered in each
+# exam's response format by mock_server) with each exam's compiled schema
+# parser and reports records/s, so parser cost can be checked against
+# network time (one request takes ~100–300 ms; a parse takes microseconds).
+#
+#   python bench_parser.py
+#   python bench_parser.py --repeat 20 --strict
+
+CORPUS = 'bipc_all_students.csv'
+
+def load_corpus(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row['Rank'] = row['Rank'] or None
+    return rows
+
+def time_parser(parse, bodies, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for body in bodies:
+            parse(body)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema parser microbenchmark")
+    parser.add_argument('--corpus', default=CORPUS)
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="passes over the corpus; the best one is reported")
+    parser.add_argument('--strict', action='store_true',
+                        help="also time the strict (drift-reporting) parsers")
+    args = parser.parse_args()
+
+    rows  = load_corpus(args.corpus)
+    exams = mock_server.build_exams()
+    print(f"[BENCH] {len(rows):,} records from {args.corpus}, best of {args.repeat}\n")
+    print(f"{'Exam':<6} {'Mode':<8} {'records/s':>12} {'µs/record':>10} {'parsed':>8}")
+    print("-" * 48)
+
+    schemas = {'ts': scraper.SCHEMA, 'ap': ap_scraper.SCHEMA, 'bipc': bipc_scraper.SCHEMA}
+
+    for key, schema in schemas.items():
+        bodies = [exams[key].format(row).encode('utf-8') for row in rows]
+        modes  = [('lenient', False)] + ([('strict', True)] if args.strict else [])
+        for mode, strict in modes:
+            parse  = schema.compile(strict=strict)
+            parsed = sum(1 for body in bodies if parse(body))
+            best   = time_parser(parse, bodies, args.repeat)
+            print(f"{key:<6} {mode:<8} {len(bodies) / best:>12,.0f} "
+                  f"{best / len(bodies) * 1e6:>10.2f} {parsed:>8,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import struct
+import zlib
+
+# ── RAW RESPONSE CAPTURE ──────────────────────────────────────────────────────
+# Append-only store of every raw response body, so a wrong field mapping can be
+# fixed by re-parsing locally (--replay) instead of re-scraping for hours.
+#
+# Layout of a capture directory:
+#   seg-000001.bin, seg-000002.bin, ...   immutable once the next one starts
+#   index.tsv                             htno <TAB> segment <TAB> frame offset
+#
+# A segment is a run of frames. Each frame is a zlib-compressed batch of
+# (htno, body) entries behind a small header, so compression works across
+# many similar bodies and a partly-written tail frame is easy to detect.
+
+FRAME_HEADER    = struct.Struct('<4sII')    # magic, compressed length, entries
+ENTRY_HEADER    = struct.Struct('<HI')      # htno length, body length
+FRAME_MAGIC     = b'CAPF'
+FRAME_ENTRIES   = 1000
+SEGMENT_BYTES   = 64 * 1024 * 1024
+INDEX_FILE      = 'index.tsv'
+
+def _segment_name(number):
+    return f"seg-{number:06d}.bin"
+
+class CaptureStore:
+    """Writes captured bodies in compressed frames and reads them back."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        segments       = sorted(f for f in os.listdir(directory) if f.startswith('seg-'))
+        self._segment  = int(segments[-1][4:10]) if segments else 1
+        self._pending  = []
+
+    # ── writing ──
+    def add(self, htno, body):
+        self._pending.append((htno, body))
+        if len(self._pending) >= FRAME_ENTRIES:
+            self.flush()
+
+    def flush(self):
+        """Writes everything added so far as one frame and indexes it."""
+        if self._pending:
+            self.write_frame(self._pending)
+            self._pending = []
+
+    def write_frame(self, entries):
+        """Writes `entries`, a list of (htno, body), as one frame and indexes it."""
+        raw = bytearray()
+        for htno, body in entries:
+            key  = htno.encode('ascii')
+            raw += ENTRY_HEADER.pack(len(key), len(body)) + key + body
+        data = zlib.compress(bytes(raw), 6)
+
+        path = os.path.join(self.directory, _segment_name(self._segment))
+        if os.path.exists(path) and os.path.getsize(path) >= SEGMENT_BYTES:
+            self._segment += 1
+            path = os.path.join(self.directory, _segment_name(self._segment))
+
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(FRAME_HEADER.pack(FRAME_MAGIC, len(data), len(entries)) + data)
+        with open(os.path.join(self.directory, INDEX_FILE), 'a') as f:
+            f.writelines(f"{htno}\t{self._segment}\t{offset}\n" for htno, _ in entries)
+
+    # ── reading ──
+    def _frames(self, segment):
+        path = os.path.join(self.directory, _segment_name(segment))
+        with open(path, 'rb') as f:
+            while True:
+                offset = f.tell()
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return
+                magic, size, _ = FRAME_HEADER.unpack(header)
+                data = f.read(size)
+                if magic != FRAME_MAGIC or len(data) < size:
+                    print(f"[CAPTURE] Truncated frame in {path} at {offset}, stopping")
+                    return
+                yield offset, zlib.decompress(data)
+
+    @staticmethod
+    def _entries(raw):
+        pos = 0
+        while pos < len(raw):
+            key_len, body_len = ENTRY_HEADER.unpack_from(raw, pos)
+            pos  += ENTRY_HEADER.size
+            htno  = raw[pos:pos + key_len].decode('ascii')
+            pos  += key_len
+            yield htno, raw[pos:pos + body_len]
+            pos  += body_len
+
+    def latest(self):
+        """
+        Yields (htno, body) for every captured ticket, once each, using the
+        most recent capture when a ticket was fetched more than once.
+        """
+        newest = {}
+        index  = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index):
+            with open(index) as f:
+                for line in f:
+                    htno, segment, offset = line.rstrip('\n').split('\t')
+                    newest[htno] = (int(segment), int(offset))
+
+        for segment in sorted({seg for seg, _ in newest.values()}):
+            for offset, raw in self._frames(segment):
+                # Later entries in a frame win over earlier ones.
+                frame = {
+                    htno: body for htno, body in self._entries(raw)
+                    if newest.get(htno) == (segment, offset)
+                }
+                for htno, body in frame.items():
+                    del newest[htno]
+                    yield htno, body
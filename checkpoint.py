@@ -0,0 +1,93 @@
+import mmap
+import os
+import struct
+
+# ── DONE-BITMAP CHECKPOINT ────────────────────────────────────────────────────
+# One bit per keyspace index, memory-mapped from disk. A bit is set as soon as
+# that ticket is resolved — fetched, or pruned as part of a dead block — no
+# matter in which order results arrive, so a resume sends exactly the tickets
+# that are still unfinished. Setting a bit is a single byte write into the
+# page cache; flush() (msync) is only needed at save points.
+
+MAGIC       = b'HTDONE01'
+HEADER      = struct.Struct('<8sQ')       # magic, number of bits
+HEADER_SIZE = HEADER.size
+
+class DoneBitmap:
+    """Persistent, memory-mapped bitset over keyspace indices [0, size)."""
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        nbytes    = HEADER_SIZE + (size + 7) // 8
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                magic, stored = HEADER.unpack(f.read(HEADER_SIZE).ljust(HEADER_SIZE, b'\0'))
+            if magic != MAGIC or stored != size:
+                raise SystemExit(
+                    f"[RESUME] {path} was written for a different keyspace "
+                    f"({stored:,} tickets, now {size:,}). Delete it to start fresh."
+                )
+        else:
+            with open(path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, size))
+                f.truncate(nbytes)
+
+        self._file = open(path, 'r+b')
+        self._map  = mmap.mmap(self._file.fileno(), nbytes)
+        self._bits = memoryview(self._map)[HEADER_SIZE:]
+
+    # ── single bits ──
+    def __contains__(self, index):
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def mark(self, index):
+        self._bits[index >> 3] |= 1 << (index & 7)
+
+    # ── ranges ──
+    def mark_range(self, start, stop):
+        """Sets every bit in [start, stop)."""
+        while start < stop and start & 7:
+            self.mark(start)
+            start += 1
+        full_stop = stop & ~7
+        if start < full_stop:
+            self._bits[start >> 3:full_stop >> 3] = b'\xff' * ((full_stop - start) >> 3)
+            start = full_stop
+        while start < stop:
+            self.mark(start)
+            start += 1
+
+    def first_unset(self, start, stop):
+        """Returns the first index in [start, stop) that is not done, or stop."""
+        while start < stop and start & 7:
+            if start not in self:
+                return start
+            start += 1
+        while start + 8 <= stop and self._bits[start >> 3] == 0xff:
+            start += 8
+        while start < stop:
+            if start not in self:
+                return start
+            start += 1
+        return stop
+
+    def count(self, start=0, stop=None):
+        """Number of done indices in [start, stop) (default: all)."""
+        stop = self.size if stop is None else stop
+        if start >= stop:
+            return 0
+        lo, hi = start >> 3, (stop + 7) >> 3
+        word   = int.from_bytes(self._bits[lo:hi], 'little') >> (start - (lo << 3))
+        return (word & ((1 << (stop - start)) - 1)).bit_count()
+
+    # ── persistence ──
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._bits.release()
+        self._map.flush()
+        self._map.close()
+        self._file.close()
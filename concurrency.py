@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+# ── AIMD CONCURRENCY CONTROL ──────────────────────────────────────────────────
+# Sizes the in-flight window from what the server is telling us, the way TCP
+# sizes its congestion window: grow by about one request per round trip while
+# latency and errors look healthy, halve once timeouts, 5xx or 429s make up
+# more than ERROR_THRESHOLD of recent responses. A server that drops the odd
+# request is healthy; only a rising error rate says it is congested.
+
+MIN_CONCURRENT    = 4       # never shrink the window below this
+BACKOFF_FACTOR    = 0.5     # multiplicative decrease on a congestion signal
+LATENCY_TOLERANCE = 2.0     # EWMA latency above baseline × this stops growth
+LATENCY_ALPHA     = 0.1     # EWMA smoothing for request latency
+ERROR_ALPHA       = 0.01    # EWMA smoothing for the error rate (≈ last 100 responses)
+ERROR_THRESHOLD   = 0.05    # error rate above which a failure cuts the window
+LOG_EVERY         = 10      # log growth each time the window crosses a multiple
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+
+    Workers call `await acquire()` before sending and `release()` after, and
+    report each request through `on_success(latency)` or
+    `on_failure(reason, started)`, `started` being its time.monotonic() send
+    time.
+    The window starts at half the ceiling, grows by 1/window per healthy
+    response (≈ +1 per round trip) up to `ceiling`, stops growing while the
+    latency EWMA is more than LATENCY_TOLERANCE × its best value, and is cut
+    by BACKOFF_FACTOR on a failure while the error-rate EWMA is above
+    ERROR_THRESHOLD. Failures of requests sent before the last cut do not cut
+    again, so one burst of timeouts counts as a single congestion event
+    rather than collapsing the window to the floor.
+    """
+
+    def __init__(self, ceiling, floor=MIN_CONCURRENT, initial=None, name=''):
+        self.ceiling   = ceiling
+        self.floor     = min(floor, ceiling)
+        self.limit     = float(initial or max(self.floor, ceiling // 2))
+        self.inflight  = 0
+        self.cuts      = 0
+        self.name      = name
+        self._latency  = None
+        self._baseline = None
+        self._errors   = 0.0
+        self._last_cut = 0.0
+        self._logged   = int(self.limit) // LOG_EVERY
+        self._freed    = asyncio.Event()
+
+    @property
+    def window(self):
+        return max(self.floor, min(self.ceiling, int(self.limit)))
+
+    # ── admission ──
+    async def acquire(self):
+        while self.inflight >= self.window:
+            self._freed.clear()
+            await self._freed.wait()
+        self.inflight += 1
+
+    def release(self):
+        self.inflight -= 1
+        self._freed.set()
+
+    # ── feedback ──
+    def _healthy(self):
+        return self._latency <= self._baseline * LATENCY_TOLERANCE
+
+    def on_success(self, latency):
+        self._errors -= ERROR_ALPHA * self._errors
+        if self._latency is None:
+            self._latency = self._baseline = latency
+        else:
+            self._latency += LATENCY_ALPHA * (latency - self._latency)
+            self._baseline = min(self._baseline, self._latency)
+        if self.limit < self.ceiling and self._healthy():
+            self.limit = min(self.ceiling, self.limit + 1 / self.limit)
+            if int(self.limit) // LOG_EVERY > self._logged:
+                self._logged = int(self.limit) // LOG_EVERY
+                self._log(f"window ↑ {self.window} (latency {self._latency * 1000:.0f} ms)")
+        self._freed.set()
+
+    def on_failure(self, reason, started):
+        self._errors += ERROR_ALPHA * (1 - self._errors)
+        if started < self._last_cut or self._errors <= ERROR_THRESHOLD:
+            return
+        before         = self.window
+        self.limit     = max(self.floor, self.limit * BACKOFF_FACTOR)
+        self._last_cut = time.monotonic()
+        self._logged   = int(self.limit) // LOG_EVERY
+        if self.window < before:
+            self.cuts += 1
+            self._log(f"window ↓ {before} → {self.window} ({reason}, "
+                      f"{self._errors:.0%} errors)")
+
+    def _log(self, message):
+        label = f" {self.name}" if self.name else ''
+        print(f"  [AIMD{label}] {message}")
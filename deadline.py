@@ -0,0 +1,124 @@
+import asyncio
+import signal
+import time
+
+# ── RUN DEADLINE ──────────────────────────────────────────────────────────────
+# A GitHub Actions job is killed at its timeout, and whatever the scraper held
+# in memory then is gone. With a wall-clock budget the run instead stops
+# itself in time:
+#
+#   budget − DRAIN_SECONDS   stop admitting: no new ticket is sent and failed
+#                            sends are no longer retried; requests in flight
+#                            finish (REQUEST_TIMEOUT at most) and land as usual
+#   budget                   anything still in flight is cancelled
+#
+# after which the output, checkpoint and reports are flushed as at the end of
+# a normal run. SIGTERM or SIGINT (a cancelled job, Ctrl-C) does the same at
+# once, with SIGNAL_GRACE seconds for the drain; a second signal cancels the
+# drain. Tickets that never completed keep their checkpoint bits unset, so a
+# resume sends them, and no completed request is lost.
+#
+# A run that stopped early exits with EXIT_PARTIAL instead of 0, so a workflow
+# can tell "keyspace finished" from "resume me".
+
+DRAIN_SECONDS = 60        # stop admitting this long before the budget runs out
+SIGNAL_GRACE  = 5         # drain time after SIGTERM/SIGINT (Actions kills ~7.5 s later)
+EXIT_PARTIAL  = 75        # exit status of a run that stopped before the keyspace finished
+
+class Deadline:
+    """
+    Wall-clock budget and stop signals for one run. The budget counts from
+    when the Deadline is created, so create it as the run starts.
+
+    start() arms the timers and signal handlers inside the running loop;
+    `on_stop()` is called once when admission stops, and `cancel` is set
+    when in-flight requests must be abandoned. `reason` says why the run
+    stopped early ('deadline', 'SIGTERM', 'SIGINT'), or is None.
+
+    Several runs in one loop (orchestrator.py) may share a Deadline: each
+    calls start() with its own `on_stop` and close() when it ends; the
+    first start() arms it (and returns True) and the last close() disarms
+    it.
+    """
+
+    def __init__(self, budget=None, drain=DRAIN_SECONDS, grace=SIGNAL_GRACE):
+        self.budget   = budget
+        self.drain    = drain if budget is None else min(drain, budget / 2)
+        self.grace    = grace
+        self.started  = time.monotonic()
+        self.reason   = None
+        self.cancel   = None
+        self._on_stop = []
+        self._runs    = 0
+        self._loop    = None
+        self._signals = []
+
+    def start(self, on_stop):
+        self._on_stop.append(on_stop)
+        self._runs += 1
+        if self._loop is not None:
+            if self.reason is not None:
+                on_stop()
+            return False
+        self._loop    = asyncio.get_running_loop()
+        self.cancel   = asyncio.Event()
+        if self.budget is not None:
+            self._loop.call_later(self.remaining(), self.stop, 'deadline')
+            self._loop.call_later(max(0.0, self.budget - self.elapsed()), self.cancel.set)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self._loop.add_signal_handler(sig, self._signalled, sig.name)
+                self._signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                pass                       # no signal handlers here (Windows)
+        return True
+
+    def close(self):
+        self._runs -= 1
+        if self._runs > 0:
+            return
+        for sig in self._signals:
+            self._loop.remove_signal_handler(sig)
+        self._signals = []
+
+    def stop(self, reason):
+        """Stops admitting new tickets (once)."""
+        if self.reason is not None:
+            return
+        self.reason = reason
+        left        = self.remaining()
+        print(f"\n  [DEADLINE] {reason}: no new tickets; draining requests in flight"
+              + (f" ({left / 60:.1f} min of budget left)" if left is not None else ""))
+        for on_stop in self._on_stop:
+            on_stop()
+
+    def _signalled(self, name):
+        if self.reason is None or self.reason == 'deadline':
+            self.stop(name)
+            self._loop.call_later(self.grace, self.cancel.set)
+        else:
+            print(f"  [DEADLINE] second {name}: abandoning requests in flight")
+            self.cancel.set()
+
+    # ── projection ──
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        """Seconds until admission stops (None without a budget)."""
+        if self.budget is None:
+            return None
+        return max(0.0, self.budget - self.drain - self.elapsed())
+
+    def projection(self, rate, tickets_left):
+        """
+        Short projection for the [SAVE] line: whether `tickets_left` fit in
+        the budget at `rate` tickets/s, and how far the run gets if not.
+        """
+        left = self.remaining()
+        if left is None or not rate:
+            return None
+        need = tickets_left / rate
+        if need <= left:
+            return f"fits budget ({left / 3600:.1f} hrs left)"
+        return f"budget ends with ~{tickets_left - rate * left:,.0f} tickets to go"
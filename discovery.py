@@ -0,0 +1,156 @@
+import json
+import os
+import time
+
+from keyspace import Block
+
+# ── TOPOLOGY DISCOVERY ────────────────────────────────────────────────────────
+# Which (center, stream) or (cc, letter) prefixes exist, and how far each one's
+# sequence numbers run, changes every exam year. Instead of crawling every
+# candidate blind, --discover probes them:
+#
+#   1. alive     every candidate prefix gets PROBE_OFFSETS sends near its
+#                first sequence number; a prefix with any hit is alive
+#   2. ceiling   each alive prefix is searched upward for its last sequence
+#                number — distance doubling until a point comes back dead,
+#                then bisection — where a point is CLUSTER consecutive sends,
+#                alive if any of them hits. A dead point is only taken as
+#                dead once a lookahead has found the rest of the next `gap`
+#                sequence numbers dead too (gap = the profile's MISS_RUN), so
+#                a run of missing tickets the scraper would walk past is not
+#                taken for the end of the block
+#
+# All candidates of a round are sent together through the engine's normal
+# stream (adaptive window, retries). The alive blocks, with their ceilings
+# plus CEILING_MARGIN, are written to the exam's topology file, which the
+# scraper then uses as its keyspace in place of its hard-coded block list.
+# Pruning (MISS_RUN) trims whatever the margin over-covers.
+
+PROBE_OFFSETS  = (0, 1, 2, 4, 9)    # first probes, relative to the first sequence number
+CLUSTER        = 3                  # consecutive sends per ceiling probe
+CEILING_MARGIN = 0.1                # added above the found ceiling, as a share of the run…
+MARGIN_FLOOR   = 10                 # …but at least this many sequence numbers
+
+# ── TOPOLOGY FILE ─────────────────────────────────────────────────────────────
+def save_topology(path, profile, blocks, stats):
+    # One block per line, so a re-probe diffs readably.
+    head = json.dumps({
+        'exam':   profile.name,
+        'url':    profile.url,
+        'probed': time.strftime('%Y-%m-%d %H:%M'),
+        'stats':  stats,
+    }, indent=1)
+    rows = ',\n'.join(f"  {json.dumps([b.prefix, b.seq_start, b.seq_end, b.width])}"
+                      for b in blocks)
+    tmp  = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(f'{head[:-2]},\n "blocks": [\n{rows}\n ]\n}}\n')
+    os.replace(tmp, path)
+
+def load_topology(path):
+    """The blocks recorded in a topology file, or None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        topology = json.load(f)
+    return [Block(prefix, seq_start, seq_end, width)
+            for prefix, seq_start, seq_end, width in topology['blocks']]
+
+# ── PROBING ───────────────────────────────────────────────────────────────────
+class _Probe:
+    """Ceiling search state of one alive candidate."""
+
+    def __init__(self, block, last_hit, gap):
+        self.block    = block
+        self.gap      = gap
+        self.lo       = last_hit    # highest sequence number known to hit
+        self.hi       = None        # lowest point known to start `gap` dead ones
+        self.checking = None        # dead point whose lookahead is being sent
+
+    def _point(self):
+        block = self.block
+        if self.hi is None:
+            if self.lo >= block.seq_end:
+                return None
+            return min(block.seq_end, self.lo + max(CLUSTER, self.lo - block.seq_start + 1))
+        if self.hi - self.lo <= CLUSTER:
+            return None
+        return (self.lo + self.hi) // 2
+
+    def _lookahead(self, point):
+        # The rest of the gap after a dead cluster, short of what is known dead.
+        limit = self.block.seq_end + 1 if self.hi is None else self.hi
+        return range(point + CLUSTER, min(point + self.gap, limit))
+
+    def next_sends(self):
+        """Sequence numbers to send next, or None once the ceiling is found."""
+        if self.checking is not None:
+            return self._lookahead(self.checking)
+        point = self._point()
+        if point is None:
+            return None
+        return range(point, min(point + CLUSTER, self.block.seq_end + 1))
+
+    def settle(self, sent, hits):
+        if hits:
+            self.lo       = max(hits)
+            self.checking = None
+        elif self.checking is not None:
+            self.hi, self.checking = self.checking, None
+        elif self._lookahead(sent.start):
+            self.checking = sent.start
+        else:
+            self.hi = sent.start
+
+    def ceiling(self):
+        block  = self.block
+        margin = max(MARGIN_FLOOR, int((self.lo - block.seq_start + 1) * CEILING_MARGIN))
+        return min(block.seq_end, self.lo + margin)
+
+async def discover(candidates, send, gap=None):
+    """
+    Probes `candidates` (Blocks spanning each candidate prefix's possible
+    sequence range) and returns (alive blocks, stats). `send(tickets)` sends
+    one round and returns (set of hit tickets, number given up on). `gap` is
+    the run of misses that ends a block (default CLUSTER).
+    """
+    gap = max(CLUSTER, gap or CLUSTER)
+    sends, unknown, rounds = 0, 0, 0
+
+    async def round_of(tickets):
+        nonlocal sends, unknown, rounds
+        hits, failed = await send(tickets)
+        sends   += len(tickets)
+        unknown += failed
+        rounds  += 1
+        return hits
+
+    # 1. alive
+    probes  = [(b, b.seq_start + o) for b in candidates for o in PROBE_OFFSETS
+               if b.seq_start + o <= b.seq_end]
+    hits    = await round_of([b.ticket(seq) for b, seq in probes])
+    alive   = {}
+    for block, seq in probes:                   # in candidate order, seq ascending
+        if block.ticket(seq) in hits:
+            alive.setdefault(block.prefix, _Probe(block, seq, gap)).lo = seq
+    print(f"[DISCOVER] {len(alive):,} of {len(candidates):,} candidate blocks alive "
+          f"after {sends:,} probes")
+
+    # 2. ceilings
+    while True:
+        sends_of = {p: p.next_sends() for p in alive.values()}
+        sends_of = {p: seqs for p, seqs in sends_of.items() if seqs is not None}
+        if not sends_of:
+            break
+        tickets = [p.block.ticket(seq) for p, seqs in sends_of.items() for seq in seqs]
+        hits    = await round_of(tickets)
+        for p, seqs in sends_of.items():
+            p.settle(seqs, [seq for seq in seqs if p.block.ticket(seq) in hits])
+        print(f"[DISCOVER] Ceiling round {rounds - 1}: {len(sends_of):,} blocks still "
+              f"searching ({sends:,} probes so far)")
+
+    blocks = [Block(p.block.prefix, p.block.seq_start, p.ceiling(), p.block.width)
+              for p in alive.values()]
+    stats  = {'candidates': len(candidates), 'alive': len(blocks), 'probes': sends,
+              'rounds': rounds, 'unknown': unknown}
+    return blocks, stats
@@ -0,0 +1,1083 @@
+import argparse
+import asyncio
+import aiohttp
+import copy
+import csv
+import math
+import os
+import sys
+import time
+from collections import Counter
+
+from capture import CaptureStore
+from checkpoint import DoneBitmap
+from concurrency import AimdController
+from deadline import EXIT_PARTIAL, Deadline
+from discovery import discover, load_topology, save_topology
+from keyspace import Keyspace
+from metrics import Metrics
+from misses import RECHECK_RATE, MissCache
+from priority import load_stats, order_by_yield, yield_curve
+from query import QUERIES, run_query
+from ranking import build_qualified
+from records import RecordTable
+from refresh import (REFRESH_DEFAULT, append_changes, append_log, diff, predicates,
+                     rewrite_csv, select_rows)
+from retry import RetryPolicy
+from sampling import JOB_MINUTES
+from scheduler import BlockScheduler, TicketFeed
+from segments import SegmentStore, has_segments
+from storage import SqliteStore
+from tracing import TRACE_RATE, Tracer
+from writer import Writer
+
+# ── SHARED SCRAPING ENGINE ────────────────────────────────────────────────────
+# One pooled keep-alive client, one concurrency model and one record pipeline
+# for every exam. Each scraper script only describes its exam as an
+# ExamProfile (URL, headers, keyspace blocks, parser, qualification rule)
+# and hands it to main().
+
+# ── CONFIG ────────────────────────────────────────────────────────────────────
+MAX_CONCURRENT  = 100
+SAVE_EVERY      = 500
+REQUEST_TIMEOUT = 10
+DNS_CACHE_TTL   = 300
+
+# ── OUTCOMES ──────────────────────────────────────────────────────────────────
+# Every send ends in one of these. Only hits and misses resolve a ticket;
+# errors and blocked responses go to the retry queue (see retry.py).
+HIT     = 'hit'
+MISS    = 'miss'
+ERROR   = 'error'       # timeout, HTTP error, dropped connection
+BLOCKED = 'blocked'     # the site refused to answer ('Referral Denied')
+
+BLOCKED_MARKERS = (b'Referral Denied',)
+
+# ── CSV FIELDS ────────────────────────────────────────────────────────────────
+FIELDS      = ['Hall Ticket No', 'Name', 'Score', 'Status', 'Rank']
+SKIP_FIELDS = ['Block', 'Skipped From', 'Skipped To', 'Last Hit']
+UNRESOLVED_FIELDS = ['Hall Ticket No', 'Outcome', 'Attempts']
+
+# ── EXAM PROFILE ──────────────────────────────────────────────────────────────
+class ExamProfile:
+    """Everything the engine needs to know about one exam."""
+
+    def __init__(self, name, script, url, schema, qualifies,
+                 build_blocks, build_sample_tickets,
+                 all_file, qualified_file, checkpoint_file, skipped_file,
+                 capture_dir, unresolved_file, db_file, metrics_file, topology_file,
+                 changes_file, refresh_log, index_file, miss_cache, trace_file, segment_dir,
+                 headers=None,
+                 build_candidates=None, pending=(), center=None, max_concurrent=MAX_CONCURRENT, miss_run=None,
+                 sample_mode=True):
+        self.name                 = name
+        self.script               = script
+        self.url                  = url
+        self.schema               = schema
+        self.parse                = schema.compile()
+        self.qualifies            = qualifies
+        self.build_blocks         = build_blocks
+        self.build_sample_tickets = build_sample_tickets
+        self.build_candidates     = build_candidates
+        self.all_file             = all_file
+        self.qualified_file       = qualified_file
+        self.checkpoint_file      = checkpoint_file
+        self.skipped_file         = skipped_file
+        self.capture_dir          = capture_dir
+        self.unresolved_file      = unresolved_file
+        self.db_file              = db_file
+        self.metrics_file         = metrics_file
+        self.topology_file        = topology_file
+        self.changes_file         = changes_file
+        self.refresh_log          = refresh_log
+        self.index_file           = index_file
+        self.miss_cache           = miss_cache
+        self.trace_file           = trace_file
+        self.segment_dir          = segment_dir
+        self.headers              = headers or {}
+        self.pending              = pending
+        self.center               = center
+        self.max_concurrent       = max_concurrent
+        self.miss_run             = miss_run
+        self.sample_mode          = sample_mode
+        self.shard                = None
+
+    def strict(self):
+        """Copy of this profile whose parser reports schema drift."""
+        strict       = copy.copy(self)
+        strict.parse = self.schema.compile(strict=True)
+        return strict
+
+    def keyspace(self):
+        """
+        The exam's full ticket keyspace (lazy — no ticket list is built): the
+        blocks of its topology file if --discover wrote one, else the
+        scraper's own block list.
+        """
+        return Keyspace(load_topology(self.topology_file) or self.build_blocks())
+
+    def for_shard(self, i, n):
+        """
+        Copy of this profile that scrapes shard i of n, with its own output,
+        checkpoint and audit files so shards never write over each other.
+        """
+        if n == 1:
+            return self
+        shard       = copy.copy(self)
+        shard.shard = (i, n)
+        for attr in ('all_file', 'qualified_file', 'checkpoint_file', 'skipped_file',
+                     'capture_dir', 'unresolved_file', 'db_file', 'metrics_file',
+                     'changes_file', 'refresh_log', 'index_file', 'miss_cache',
+                     'trace_file', 'segment_dir'):
+            root, ext = os.path.splitext(getattr(self, attr))
+            setattr(shard, attr, f"{root}.shard{i}of{n}{ext}")
+        return shard
+
+# ── CHECKPOINT ────────────────────────────────────────────────────────────────
+def load_checkpoint(profile, total_full):
+    """Opens (or creates) the exam's done-bitmap over the full keyspace."""
+    resuming = os.path.exists(profile.checkpoint_file)
+    done     = DoneBitmap(profile.checkpoint_file, total_full)
+    if resuming:
+        print(f"[RESUME] {done.count():,} of {total_full:,} tickets already done")
+    return done
+
+# ── CSV HELPERS ───────────────────────────────────────────────────────────────
+def init_csv(filepath):
+    if not os.path.exists(filepath):
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            csv.DictWriter(f, fieldnames=FIELDS).writeheader()
+        print(f"[INIT] Created {filepath}")
+    else:
+        print(f"[INIT] Appending to existing {filepath}")
+
+def flush_to_csv(filepath, records):
+    with open(filepath, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writerows(records)
+
+# ── OUTPUT STORES ─────────────────────────────────────────────────────────────
+# All stores take batches of hits through write(), replace existing rows
+# through update() ({htno: record}, for --refresh) and produce the CSV
+# outputs through export(), which returns (students, qualified, top).
+
+class CsvStore:
+    """Default backend: appends hits to the all-students CSV."""
+
+    def __init__(self, profile, fresh=False):
+        self.profile = profile
+        if fresh and os.path.exists(profile.all_file):
+            os.remove(profile.all_file)
+        init_csv(profile.all_file)
+
+    def write(self, records):
+        flush_to_csv(self.profile.all_file, records)
+
+    def update(self, records):
+        rewrite_csv(self.profile.all_file, FIELDS, records)
+
+    def export(self, profile):
+        return build_qualified(profile, FIELDS)
+
+    def close(self):
+        pass
+
+def open_store(profile, sqlite=False, fresh=False, segments=False):
+    """
+    The output store for a run: the SQLite database with --sqlite, the
+    segment store with --segments or once the exam has one (segments.py),
+    else the CSV. A new database or segment store first imports an existing
+    all-students CSV, so switching backends mid-scrape keeps what was
+    already found.
+    """
+    if sqlite:
+        new   = not os.path.exists(profile.db_file)
+        store = SqliteStore(profile.db_file, FIELDS)
+    elif segments or has_segments(profile.segment_dir):
+        new   = not has_segments(profile.segment_dir)
+        store = SegmentStore(profile.segment_dir, FIELDS, fresh)
+    else:
+        return CsvStore(profile, fresh)
+    if new and not fresh and os.path.exists(profile.all_file):
+        if sqlite:
+            imported = store.import_csv(profile.all_file)
+        else:
+            with open(profile.all_file, newline='', encoding='utf-8') as f:
+                store.write(csv.DictReader(f))
+            imported = store.sealed() + store.open_rows
+        print(f"[INIT] Imported {imported:,} rows from {profile.all_file}")
+    if not sqlite:
+        print(f"[INIT] Segment store {profile.segment_dir}/: "
+              f"{len(store.manifest['segments']):,} sealed segments, "
+              f"{store.open_rows:,} rows in the open one")
+    return store
+
+def skip_logger(profile):
+    """Returns an on_skip callback that appends pruned ranges to the audit CSV."""
+    if not os.path.exists(profile.skipped_file):
+        with open(profile.skipped_file, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(SKIP_FIELDS)
+
+    def on_skip(block, seq_from, seq_to, last_hit):
+        with open(profile.skipped_file, 'a', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow([
+                block.prefix,
+                block.ticket(seq_from),
+                block.ticket(seq_to),
+                block.ticket(last_hit) if last_hit >= block.seq_start else '',
+            ])
+
+    return on_skip
+
+def write_unresolved(profile, unresolved):
+    """
+    Writes the tickets that never resolved, so they can be fed straight back
+    in with --tickets. Removes a stale report when everything resolved.
+    """
+    if not unresolved:
+        if os.path.exists(profile.unresolved_file):
+            os.remove(profile.unresolved_file)
+        return
+    with open(profile.unresolved_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(UNRESOLVED_FIELDS)
+        writer.writerows((htno, outcome, sends)
+                         for htno, (outcome, sends) in sorted(unresolved.items()))
+
+def read_ticket_file(path, keyspace=None):
+    """
+    Hall tickets from the first column of a CSV (header optional) or a plain
+    list. The first row is taken for a header if it is FIELDS[0] or, given
+    the exam's `keyspace`, not one of its tickets.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        tickets = [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+    if tickets and (tickets[0] == FIELDS[0]
+                    or keyspace is not None and tickets[0] not in keyspace):
+        tickets = tickets[1:]
+    return tickets
+
+# ── HTTP CLIENT ───────────────────────────────────────────────────────────────
+def open_session(profile, trace_configs=None):
+    """
+    Pooled keep-alive session: connections are reused across tickets, so
+    TCP+TLS setup is paid once per pooled socket instead of once per request.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=profile.max_concurrent,
+        ttl_dns_cache=DNS_CACHE_TTL,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=profile.headers,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        trace_configs=trace_configs,
+    )
+
+async def scrape_one(session, profile, htno, capture=None, controller=None,
+                     metrics=None, tracer=None):
+    """
+    Sends one ticket and returns (htno, outcome, record); record is only set
+    for a HIT. Timeouts, 5xx/429, dropped connections and blocked responses
+    are congestion signals for the controller; any other response that came
+    back counts as healthy. With a Metrics, every send is also reported with
+    its status, outcome and latency; with a Tracer, the sends it draws are
+    timed phase by phase.
+    """
+    start = time.monotonic()
+    span  = tracer.begin() if tracer is not None else None
+    if metrics is not None:
+        metrics.sending()
+    htno, outcome, record, status = await _send(session, profile, htno, capture,
+                                                controller, start, span)
+    if metrics is not None:
+        metrics.request(status, outcome, time.monotonic() - start)
+    if span is not None:
+        if outcome == ERROR:
+            span.lap('failed')
+        tracer.end(span, outcome)
+    return htno, outcome, record
+
+async def _send(session, profile, htno, capture, controller, start, span=None):
+    # scrape_one's request proper; also returns the status label for metrics.
+    try:
+        async with session.get(profile.url, params={'htno': htno},
+                               trace_request_ctx=span) as resp:
+            resp.raise_for_status()
+            body = await resp.read()
+            if span is not None:
+                span.lap('body')
+    except asyncio.TimeoutError:
+        if controller is not None:
+            controller.on_failure('timeout', start)
+        return htno, ERROR, None, 'timeout'
+    except aiohttp.ClientResponseError as e:
+        if controller is not None and (e.status >= 500 or e.status == 429):
+            controller.on_failure(f"HTTP {e.status}", start)
+        return htno, ERROR, None, f"HTTP {e.status}"
+    except aiohttp.ClientError:
+        if controller is not None:
+            controller.on_failure('connection error', start)
+        return htno, ERROR, None, 'connection error'
+    except Exception as e:
+        return htno, ERROR, None, type(e).__name__
+
+    if any(marker in body for marker in BLOCKED_MARKERS):
+        if controller is not None:
+            controller.on_failure('blocked', start)
+        return htno, BLOCKED, None, 'blocked'
+    if controller is not None:
+        controller.on_success(time.monotonic() - start)
+    if capture is not None:
+        capture.add(htno, body)
+    record = profile.parse(body)
+    if span is not None:
+        span.lap('parse')
+    return htno, (HIT if record else MISS), record, 'HTTP 200'
+
+# ── STREAMING SUBMISSION ──────────────────────────────────────────────────────
+async def _scrape_worker(session, profile, source, results, capture, controller,
+                         metrics, tracer):
+    # `source` is shared by every worker, so each ticket is pulled exactly
+    # once and only when a worker is free to send it. With a controller, a
+    # worker then needs one of its slots to send; it takes the slot only once
+    # it holds a ticket, so a worker waiting on a deferred retry or the end
+    # of the keyspace does not keep a slot another worker (or exam) could use.
+    try:
+        while True:
+            htno = await source.next_ticket()
+            if htno is None:
+                break
+            if controller is not None:
+                await controller.acquire()
+            try:
+                result = await scrape_one(session, profile, htno, capture, controller,
+                                          metrics, tracer)
+            finally:
+                if controller is not None:
+                    controller.release()
+            await results.put(result)
+    finally:
+        await results.put(None)
+
+async def stream_scrape(session, profile, source, window=None, capture=None,
+                        controller=None, retries=None, metrics=None, stop=None,
+                        tracer=None):
+    """
+    Yields (htno, outcome, record) as tickets resolve.
+
+    Tickets are drawn lazily from `source` (a TicketFeed, BlockScheduler or
+    any iterable of tickets) by a fixed pool of `window` workers, so at most
+    `window` requests are in flight and no per-ticket task or future exists
+    before its request is sent. Memory stays flat however large the keyspace
+    is. With an AimdController, the pool is sized to its ceiling and the
+    controller decides how many of those workers may send at once. With a
+    CaptureStore, every raw response body is also captured; with a Metrics,
+    every send and every yielded ticket is counted; with a Tracer, a sample
+    of sends is timed phase by phase.
+
+    An ERROR or BLOCKED send is handed back to the source for a later retry
+    as `retries` (a RetryPolicy) decides, and is only yielded once the policy
+    gives up on it — so every ticket is yielded exactly once, as a HIT, a
+    MISS, or its last failed outcome.
+
+    Setting `stop` (an asyncio.Event) cancels the requests still in flight
+    and ends the stream early; those tickets are simply never yielded.
+    """
+    window  = window or (controller.ceiling if controller else profile.max_concurrent)
+    retries = retries or RetryPolicy()
+    if not hasattr(source, 'next_ticket'):
+        source = TicketFeed(source)
+    results = asyncio.Queue(maxsize=window)
+    workers = [
+        asyncio.create_task(_scrape_worker(session, profile, source, results,
+                                           capture, controller, metrics, tracer))
+        for _ in range(window)
+    ]
+    watcher = asyncio.create_task(_cancel_on(stop, workers)) if stop is not None else None
+    try:
+        remaining = len(workers)
+        while remaining:
+            item = await results.get()
+            if item is None:
+                remaining -= 1
+                continue
+            htno, outcome, record = item
+            if outcome in (ERROR, BLOCKED):
+                delay = retries.backoff(htno, outcome)
+                if delay is not None:
+                    source.defer(htno, delay)
+                    continue
+                source.give_up(htno)
+            else:
+                # The source hears about a result in the same step the caller
+                # receives it, so anything it commits has reached the caller.
+                retries.resolved(htno)
+                source.record(htno, record)
+            if metrics is not None:
+                metrics.ticket(htno, outcome, record is not None)
+            yield item
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+async def _cancel_on(stop, workers):
+    # A cancelled worker still posts its end marker, so the stream winds down
+    # through its normal path.
+    await stop.wait()
+    for w in workers:
+        w.cancel()
+
+# ── TICKET SELECTION ──────────────────────────────────────────────────────────
+def select_tickets(profile, tickets=None, prioritize=None, recheck=RECHECK_RATE):
+    """
+    Returns (source, planned, total_full, done). Sample mode feeds the sample
+    list as-is with no checkpoint; full mode walks the keyspace blocks that
+    still have unfinished tickets, with pruning, skipping the misses cached
+    by earlier runs (a `recheck` share of them is sent anyway) — densest
+    first when `prioritize` names a prior results CSV or metrics file (see
+    priority.py).
+    An explicit `tickets` list (a targeted re-run, e.g. of an unresolved
+    report) is fed as-is against the checkpoint, in either mode.
+    """
+    keyspace   = profile.keyspace()
+    total_full = len(keyspace)
+    if os.path.exists(profile.topology_file):
+        print(f"[TOPOLOGY] Keyspace from {profile.topology_file}: "
+              f"{len(list(keyspace.blocks())):,} blocks, {total_full:,} tickets")
+    if profile.shard:
+        keyspace = keyspace.shard(*profile.shard)
+        i, n     = profile.shard
+        print(f"[SHARD {i}/{n}] Keyspace indices {keyspace.start:,}–{keyspace.stop:,} "
+              f"({len(keyspace):,} of {total_full:,} tickets)")
+
+    if tickets is not None:
+        done    = load_checkpoint(profile, total_full)
+        unknown = [t for t in tickets if t not in keyspace]
+        tickets = [t for t in tickets
+                   if t in keyspace and keyspace.index(t) not in done]
+        print(f"[TICKETS] Re-running {len(tickets):,} listed tickets")
+        if unknown:
+            print(f"          {len(unknown):,} not in this keyspace, ignored "
+                  f"(e.g. {unknown[0]})")
+        print()
+        return TicketFeed(tickets, done, keyspace.index), len(tickets), total_full, done
+
+    if profile.sample_mode:
+        sample = profile.build_sample_tickets(keyspace)
+        print(f"[SAMPLE MODE] Running {len(sample):,} tickets")
+        print(f"              from full keyspace of {total_full:,}")
+        if hasattr(sample, 'strata'):
+            print(f"              drawn at random within {len(sample.strata):,} strata "
+                  f"(block group × sequence band)")
+        print(f"              Set SAMPLE_MODE = False for full scrape\n")
+        source = sample if hasattr(sample, 'next_ticket') else TicketFeed(sample)
+        return source, len(sample), total_full, None
+
+    done    = load_checkpoint(profile, total_full)
+    blocks  = [
+        b for b in keyspace.blocks()
+        if done.first_unset(b.offset, b.offset + len(b)) < b.offset + len(b)
+    ]
+    planned = len(keyspace) - done.count(keyspace.start, keyspace.stop)
+    print(f"[FULL MODE] {planned:,} tickets remaining of {len(keyspace):,}")
+    if profile.miss_run is not None:
+        print(f"            {len(blocks):,} blocks, each closed after "
+              f"{profile.miss_run} misses past its last hit")
+        print(f"            Pruned ranges → {profile.skipped_file}")
+    misses = MissCache(profile.miss_cache, recheck)
+    if os.path.exists(profile.miss_cache):
+        print(f"            {len(misses):,} known misses in {profile.miss_cache} skipped, "
+              f"{recheck:.0%} of them re-checked (--recheck)")
+    if prioritize:
+        blocks = prioritize_blocks(blocks, prioritize, keyspace, profile.miss_run)
+    print()
+
+    source = BlockScheduler(blocks, profile.miss_run,
+                            on_skip=skip_logger(profile), done=done, misses=misses)
+    return source, planned, total_full, done
+
+def prior_results(profile):
+    """The exam's own earlier output to --prioritize from, or None if it has none."""
+    if has_segments(profile.segment_dir):
+        return profile.segment_dir
+    if os.path.exists(profile.all_file):
+        return profile.all_file
+    return None
+
+def prioritize_blocks(blocks, path, keyspace, miss_run):
+    """Orders `blocks` by expected yield from the statistics in `path`."""
+    stats   = load_stats(path, keyspace, miss_run)
+    ordered = order_by_yield(blocks, stats)
+    known   = sum(1 for b in blocks if b.prefix in stats)
+    print(f"[PRIORITY] Blocks ordered by expected yield from {path}")
+    print(f"           {known:,} of {len(blocks):,} blocks have prior hits; "
+          f"the rest go last, in keyspace order")
+    if known:
+        hits, cost = stats[ordered[0].prefix]
+        print(f"           Densest: {ordered[0].prefix} ({hits / cost:.2f} hits/request)")
+        before = yield_curve(blocks, stats, miss_run)
+        after  = yield_curve(ordered, stats, miss_run)
+        print("           Expected share of hits after "
+              + ", ".join(f"{p:.0%}" for p, _ in after) + " of requests: "
+              + " / ".join(f"{a:.0%}" for _, a in after)
+              + " (keyspace order: " + " / ".join(f"{b:.0%}" for _, b in before) + ")")
+    return ordered
+
+# ── MAIN ASYNC PIPELINE ───────────────────────────────────────────────────────
+async def run_async_scraper(profile, source, planned, total_full, done=None,
+                            capture=None, trace_configs=None, adaptive=True,
+                            store=None, deadline=None, controller=None, name='',
+                            tracer=None):
+    """
+    Scrapes `source` to the end, or until `deadline` (a Deadline) stops it,
+    then flushes everything. Returns True if the source ran to the end.
+
+    `controller` replaces the run's own AIMD controller, e.g. with a Lane of
+    a host budget shared with other exams (see orchestrator.py); `name`
+    labels the run's progress lines when several run at once. With a Tracer
+    (tracing.py), a sample of requests and every local stage are timed and
+    reported at the end.
+    """
+    store      = store or CsvStore(profile)
+    writer     = Writer(store, capture, done, tracer=tracer)
+    retries    = RetryPolicy()
+    label      = f" {name}" if name else ''
+    if controller is None and adaptive:
+        controller = AimdController(profile.max_concurrent)
+        print(f"[AIMD] Adaptive window: starts at {controller.window}, "
+              f"ceiling {controller.ceiling}\n")
+    metrics  = Metrics(profile, profile.metrics_file, planned,
+                       group=profile.keyspace().prefix, controller=controller,
+                       retries=retries, source=source, writer=writer)
+    reporter = asyncio.create_task(metrics.run())
+    print(f"[METRICS] Live metrics → {profile.metrics_file} "
+          f"(python metrics.py {profile.metrics_file} --follow)\n")
+    if tracer is not None:
+        trace_configs = [*(trace_configs or ()), tracer.config()]
+        print(f"[TRACE] Timing {tracer.rate:g} of requests phase by phase "
+              f"→ {profile.trace_file}\n")
+
+    def stop_admitting():
+        source.close()
+        retries.stop()
+
+    deadline = deadline or Deadline()
+    if deadline.start(stop_admitting) and deadline.budget is not None:
+        print(f"[DEADLINE] Budget {deadline.budget / 60:g} min: new tickets stop "
+              f"{deadline.drain:.0f} s before it, then requests in flight drain\n")
+
+    buffer      = RecordTable(FIELDS)
+    found       = 0
+    processed   = 0
+    start_wall  = time.time()
+
+    async with open_session(profile, trace_configs) as session:
+        async for htno, outcome, record in stream_scrape(session, profile, source,
+                                                         capture=writer if capture else None,
+                                                         controller=controller,
+                                                         retries=retries,
+                                                         metrics=metrics,
+                                                         stop=deadline.cancel,
+                                                         tracer=tracer):
+            processed += 1
+
+            if record:
+                mark = time.perf_counter()
+                buffer.append(record)
+                if tracer is not None:
+                    tracer.stage('buffer', time.perf_counter() - mark)
+                found += 1
+
+                if len(buffer) >= SAVE_EVERY:
+                    mark = time.perf_counter()
+                    await writer.commit(buffer, source.take_commit())
+                    if tracer is not None:
+                        tracer.stage('commit_wait', time.perf_counter() - mark)
+                    buffer  = RecordTable(FIELDS)
+                    elapsed = time.time() - start_wall
+                    rate    = processed / elapsed
+                    skipped = getattr(source, 'skipped', 0) + getattr(source, 'cached', 0)
+                    left    = max(0, planned - skipped - processed)
+                    eta_hrs = left / rate / 3600
+                    window  = controller.window if controller else profile.max_concurrent
+                    fits    = deadline.projection(rate, left)
+                    print(
+                        f"  [SAVE{label}] {found} students | "
+                        f"{processed:,} processed | "
+                        f"{rate:.1f} req/s | "
+                        f"window {window} | "
+                        f"{retries.retries:,} retries | "
+                        f"ETA: {eta_hrs:.1f} hrs"
+                        + (f" | {fits}" if fits else "")
+                    )
+
+        await writer.commit(buffer, source.take_commit())
+        await writer.close()
+    deadline.close()
+    if deadline.reason is not None:
+        retries.abandon()
+    reporter.cancel()
+    await metrics.write('finished' if deadline.reason is None else 'stopped')
+    if buffer:
+        print(f"  [FINAL FLUSH] {len(buffer)} records written")
+    if done is not None:
+        done.close()
+    misses = getattr(source, 'misses', None)
+    if misses is not None:
+        misses.save()
+    if controller is not None:
+        print(f"  [AIMD{label}] Final window {controller.window} of {controller.ceiling} "
+              f"({controller.cuts} backoffs)")
+    if writer.stalls:
+        print(f"  [WRITER] Scrape loop waited on the disk at {writer.stalls} save points")
+    write_unresolved(profile, retries.unresolved)
+
+    wall_time = time.time() - start_wall
+    estimate  = None
+    if hasattr(source, 'estimate') and processed:
+        estimate = source.estimate(processed / wall_time, profile.miss_run)
+
+    ranked = store.export(profile)
+    store.close()
+    print_summary(profile, processed, found, ranked, wall_time, total_full,
+                  skipped=getattr(source, 'skipped', 0), retries=retries, misses=misses,
+                  cached=getattr(source, 'cached', 0), estimate=estimate)
+    if tracer is not None:
+        tracer.write(profile.trace_file, profile.name)
+        tracer.print_summary(profile.trace_file)
+    if deadline.reason is not None:
+        print(f"[DEADLINE] Stopped early ({deadline.reason}); everything completed "
+              f"is saved and checkpointed. Run {profile.script} again to resume.\n")
+    return deadline.reason is None
+
+# ── TOPOLOGY DISCOVERY ────────────────────────────────────────────────────────
+async def _probe(profile, candidates, adaptive=True):
+    controller = AimdController(profile.max_concurrent) if adaptive else None
+    async with open_session(profile) as session:
+        async def send(tickets):
+            hits, failed = set(), 0
+            async for htno, outcome, record in stream_scrape(session, profile,
+                                                             TicketFeed(tickets),
+                                                             controller=controller):
+                if record:
+                    hits.add(htno)
+                elif outcome in (ERROR, BLOCKED):
+                    failed += 1
+            return hits, failed
+        return await discover(candidates, send, profile.miss_run)
+
+def discover_topology(profile, adaptive=True):
+    """Probes the exam's candidate blocks and writes its topology file."""
+    if profile.build_candidates is None:
+        raise SystemExit(f"[DISCOVER] {profile.script} defines no candidate blocks")
+    candidates = profile.build_candidates()
+    start      = time.time()
+    print(f"[DISCOVER] Probing {len(candidates):,} candidate blocks of {profile.name}\n")
+    blocks, stats = asyncio.run(_probe(profile, candidates, adaptive))
+    save_topology(profile.topology_file, profile, blocks, stats)
+
+    found = {b.prefix for b in blocks}
+    known = {b.prefix for b in profile.build_blocks()}
+    print(f"\n{'=' * 65}")
+    print(f"{profile.name} TOPOLOGY")
+    print(f"{'=' * 65}")
+    print(f"  Candidate blocks        : {stats['candidates']:,}")
+    print(f"  Alive blocks            : {stats['alive']:,}")
+    print(f"  Tickets in keyspace     : {sum(len(b) for b in blocks):,}")
+    print(f"  Probes sent             : {stats['probes']:,} in {stats['rounds']} rounds")
+    print(f"  Probes never answered   : {stats['unknown']:,}")
+    print(f"  Time taken              : {time.time() - start:.1f}s")
+    print(f"  Built-in block list     : {len(found & known):,} confirmed, "
+          f"{len(found - known):,} new, {len(known - found):,} not found")
+    print(f"\n  Saved → {profile.topology_file} (used as the keyspace from now on; "
+          f"delete it to go back to the built-in list)")
+    print(f"{'=' * 65}")
+
+# ── INCREMENTAL REFRESH ───────────────────────────────────────────────────────
+async def _refetch(profile, tickets, adaptive=True):
+    # Returns ({htno: record} of the hits, tickets now missing, RetryPolicy).
+    controller = AimdController(profile.max_concurrent) if adaptive else None
+    retries    = RetryPolicy()
+    found, gone = {}, []
+    async with open_session(profile) as session:
+        async for htno, outcome, record in stream_scrape(session, profile,
+                                                         TicketFeed(tickets),
+                                                         controller=controller,
+                                                         retries=retries):
+            if record:
+                found[htno] = record
+            elif outcome == MISS:
+                gone.append(htno)
+    return found, gone, retries
+
+def refresh(profile, spec=REFRESH_DEFAULT, sqlite=False, adaptive=True):
+    """
+    --refresh: re-fetches the rows matching `spec` (see refresh.py), updates
+    the changed ones in place and appends their old and new values to the
+    changes file.
+    """
+    if has_segments(profile.segment_dir):
+        SegmentStore(profile.segment_dir, FIELDS).merge(profile.all_file)
+    if not os.path.exists(profile.all_file):
+        raise SystemExit(f"[REFRESH] {profile.all_file} not found")
+    try:
+        match = predicates(spec, profile)
+    except ValueError as e:
+        raise SystemExit(f"[REFRESH] {e}")
+    rows, total = select_rows(profile.all_file, match)
+    print(f"[REFRESH] {len(rows):,} of {total:,} rows in {profile.all_file} match {spec}\n")
+    if not rows:
+        return
+
+    start = time.time()
+    found, gone, retries = asyncio.run(_refetch(profile, list(rows), adaptive))
+    changes = {htno: diff(rows[htno], record, FIELDS) for htno, record in found.items()}
+    changes = {htno: fields for htno, fields in changes.items() if fields}
+
+    store = open_store(profile, sqlite)
+    if changes:
+        store.update({htno: found[htno] for htno in changes})
+        append_changes(profile.changes_file, time.strftime('%Y-%m-%d %H:%M'), changes)
+    append_log(profile.refresh_log, [*found, *gone], time.time())
+    students, qualified, _ = store.export(profile)
+    store.close()
+
+    print(f"\n{'=' * 65}")
+    print(f"{profile.name} REFRESH SUMMARY")
+    print(f"{'=' * 65}")
+    print(f"  Tickets re-fetched      : {len(rows):,}")
+    print(f"  Changed                 : {len(changes):,}")
+    print(f"  Unchanged               : {len(found) - len(changes):,}")
+    if gone:
+        print(f"  No record now (kept)    : {len(gone):,}")
+    if retries.unresolved:
+        print(f"  Unresolved (kept)       : {len(retries.unresolved):,}")
+    print(f"  Qualified students      : {qualified:,} of {students:,}")
+    print(f"  Time taken              : {time.time() - start:.1f}s")
+    for field, count in Counter(f for fields in changes.values()
+                                for f, _, _ in fields).most_common():
+        print(f"    {count:>8,}  {field} changed")
+    if changes:
+        print(f"\n  Saved → {profile.changes_file}")
+    print(f"  Saved → {profile.all_file}")
+    print(f"  Saved → {profile.qualified_file}")
+    print(f"{'=' * 65}")
+
+# ── QUALIFIED CSV ─────────────────────────────────────────────────────────────
+def rank_only(profile, sqlite=False):
+    """
+    --rank: rebuild the qualified file (and with --sqlite or a segment store,
+    the all-students CSV) from the output as it is now, e.g. partial output
+    of a live run.
+    """
+    source = profile.db_file if sqlite else profile.all_file
+    if not sqlite and has_segments(profile.segment_dir):
+        source = profile.segment_dir
+    if not os.path.exists(source):
+        raise SystemExit(f"[RANK] {source} not found")
+    start = time.time()
+    store = open_store(profile, sqlite)
+    students, qualified, _ = store.export(profile)
+    store.close()
+    print(f"[RANK] {qualified:,} qualified of {students:,} students in {source} "
+          f"→ {profile.qualified_file} ({time.time() - start:.1f}s)")
+
+def export_segments(profile):
+    """--export: merge the segment store into the single all-students and qualified CSVs."""
+    if not has_segments(profile.segment_dir):
+        raise SystemExit(f"[EXPORT] No segment store at {profile.segment_dir}")
+    start = time.time()
+    store = SegmentStore(profile.segment_dir, FIELDS)
+    try:
+        students, qualified, _ = store.export(profile)
+    except ValueError as e:
+        raise SystemExit(f"[EXPORT] {e}")
+    print(f"[EXPORT] {len(store.manifest['segments']):,} sealed segments + "
+          f"{store.open_rows:,} open rows → {students:,} students in {profile.all_file}, "
+          f"{qualified:,} qualified in {profile.qualified_file} "
+          f"({time.time() - start:.1f}s)")
+
+# ── OFFLINE REPLAY ────────────────────────────────────────────────────────────
+def replay(profile, sqlite=False):
+    """
+    Rebuilds the all-students and qualified CSVs from the capture store by
+    re-parsing every captured body. No network access.
+    """
+    if not os.path.isdir(profile.capture_dir):
+        raise SystemExit(f"[REPLAY] No capture store at {profile.capture_dir}")
+    print(f"[REPLAY] Re-parsing captured responses from {profile.capture_dir}")
+    store = open_store(profile, sqlite, fresh=True)
+
+    buffer      = RecordTable(FIELDS)
+    found       = 0
+    processed   = 0
+    start_wall  = time.time()
+
+    for htno, body in CaptureStore(profile.capture_dir).latest():
+        processed += 1
+        record = profile.parse(body)
+        if record:
+            buffer.append(record)
+            found += 1
+            if len(buffer) >= SAVE_EVERY:
+                store.write(buffer)
+                buffer = RecordTable(FIELDS)
+    store.write(buffer)
+
+    ranked = store.export(profile)
+    store.close()
+    print_summary(profile, processed, found, ranked,
+                  time.time() - start_wall, processed, sample=False)
+
+# ── SUMMARY ───────────────────────────────────────────────────────────────────
+def print_summary(profile, processed, found, ranked, wall_time, total_full,
+                  skipped=0, sample=None, retries=None, misses=None, cached=0,
+                  estimate=None):
+    rate   = processed / wall_time if wall_time else 0.0
+    sample = profile.sample_mode if sample is None else sample
+    students, qualified, top = ranked
+
+    print("\n" + "=" * 65)
+    print(f"{profile.name} SCRAPE SUMMARY")
+    print("=" * 65)
+    print(f"  Total tickets processed : {processed:,}")
+    if skipped:
+        print(f"  Pruned (dead blocks)    : {skipped:,}")
+    if cached:
+        print(f"  Known misses (skipped)  : {cached:,}")
+    print(f"  Total students found    : {found:,}")
+    if students != found:
+        print(f"  Students in output      : {students:,}")
+    print(f"  Qualified students      : {qualified:,}")
+    print(f"  Not Qualified           : {students - qualified:,}")
+    print(f"  Time taken              : {wall_time:.1f}s")
+    print(f"  Avg speed               : {rate:.1f} req/s")
+    if retries is not None:
+        print(f"  Retries                 : {retries.retries:,}")
+        print(f"  Unresolved              : {len(retries.unresolved):,}")
+    if misses is not None:
+        print(f"  Miss cache              : {len(misses):,} (+{misses.added:,} this run)")
+        if misses.late:
+            print(f"  Late additions          : {misses.late:,} cached misses now hit"
+                  + (" — consider --recheck 1" if misses.recheck < 1 else ""))
+    drift = getattr(profile.parse, 'drift', None)
+    if drift:
+        print(f"  Schema drift            : {sum(drift.values()):,} responses")
+        for kind, count in drift.most_common():
+            print(f"    {count:>8,}  {kind}")
+    print(f"\n  Saved → {profile.all_file}")
+    print(f"  Saved → {profile.qualified_file}")
+    if retries is not None and retries.unresolved:
+        print(f"  Saved → {profile.unresolved_file}  "
+              f"(re-run with: python {profile.script} --tickets {profile.unresolved_file})")
+
+    print(f"\nTOP 10 QUALIFIED STUDENTS:")
+    print(f"{'Rank':<8} {'Hall Ticket':<15} {'Name':<35} {'Score'}")
+    print("-" * 75)
+    for r in top:
+        print(
+            f"  {str(r['Rank']):<6} "
+            f"{r['Hall Ticket No']:<15} "
+            f"{r['Name']:<35} "
+            f"{r['Score']}"
+        )
+
+    if sample and rate:
+        print(f"\n{'='*65}")
+        print(f"  SAMPLE COMPLETE — results look good?")
+        print(f"  Set SAMPLE_MODE = False in {profile.script} and run again")
+        if estimate is None:
+            full_eta = total_full / rate / 3600
+            print(f"  Estimated full scrape: {full_eta:.1f} hours for {total_full:,} tickets")
+        else:
+            students, margin = estimate['students'], estimate['margin']
+            pruning = (f"MISS_RUN {profile.miss_run}" if profile.miss_run is not None
+                       else "no pruning")
+            runners = max(1, math.ceil(estimate['hours'] * 60 / JOB_MINUTES))
+            print(f"\n  Full-run estimate ({estimate['strata']:,} strata, 95% CI):")
+            print(f"    Students            : {students:,.0f} ± {margin:,.0f} "
+                  f"({max(0, students - margin):,.0f}–{students + margin:,.0f})")
+            print(f"    Requests            : at most ~{estimate['requests']:,} of "
+                  f"{estimate['total']:,} tickets ({pruning})")
+            print(f"    Wall time           : {estimate['hours']:.1f} hours at {rate:.1f} req/s "
+                  f"(this sample's throughput)")
+            print(f"    Runners             : {runners} × {JOB_MINUTES}-min job"
+                  + (f" (--shard i/{runners})" if runners > 1 else ""))
+        print(f"{'='*65}")
+
+# ── ENTRY POINT ───────────────────────────────────────────────────────────────
+def run_profile(profile, capture=False, adaptive=True, tickets=None, sqlite=False,
+                prioritize=None, budget=None, recheck=RECHECK_RATE, trace=None,
+                segments=False):
+    """
+    Runs one scrape; returns True if it finished, False if it stopped early.
+    `trace` is the share of requests to trace (None: no tracing).
+    """
+    deadline = Deadline(budget)
+    source, planned, total_full, done = select_tickets(profile, tickets, prioritize,
+                                                       recheck)
+    store = open_store(profile, sqlite, segments=segments)
+    captured = None
+    if capture:
+        captured = CaptureStore(profile.capture_dir)
+        print(f"[CAPTURE] Raw responses → {profile.capture_dir}/\n")
+    return asyncio.run(run_async_scraper(profile, source, planned, total_full, done,
+                                         captured, adaptive=adaptive, store=store,
+                                         deadline=deadline,
+                                         tracer=Tracer(trace) if trace else None))
+
+def parse_shard(value):
+    try:
+        i, n = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"shard {value}: need 0 <= i < N")
+    return i, n
+
+def build_arg_parser(profile):
+    parser = argparse.ArgumentParser(description=f"{profile.name} results scraper",
+                                     epilog=f"--query {QUERIES}",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--shard', metavar='i/N', type=parse_shard,
+        help="scrape only shard i of N (0-based) of the keyspace; each shard "
+             "gets its own output, checkpoint and audit files",
+    )
+    parser.add_argument(
+        '--capture', action='store_true',
+        help="also store every raw response body in the compressed capture "
+             "store, so the output can be rebuilt later with --replay",
+    )
+    parser.add_argument(
+        '--replay', action='store_true',
+        help="rebuild the CSV outputs from the capture store without any "
+             "network access",
+    )
+    parser.add_argument(
+        '--rank', action='store_true',
+        help="only rebuild the qualified/ranked CSV from the all-students CSV "
+             "(works on partial output, e.g. while a run is still going)",
+    )
+    parser.add_argument(
+        '--tickets', metavar='FILE',
+        help="send only the hall tickets listed in FILE (first CSV column), "
+             "e.g. the unresolved report of an earlier run",
+    )
+    parser.add_argument(
+        '--fixed-window', action='store_true',
+        help="keep MAX_CONCURRENT requests in flight at all times instead of "
+             "sizing the window adaptively (AIMD) up to that ceiling",
+    )
+    parser.add_argument(
+        '--sqlite', action='store_true',
+        help="store hits in the exam's SQLite database (upserted by hall "
+             "ticket, so re-runs never duplicate) and export the CSVs from it",
+    )
+    parser.add_argument(
+        '--segments', action='store_true',
+        help="append hits to fixed-size, compressed, immutable segments in "
+             f"{profile.segment_dir}/ with a manifest, so a checkpoint commit "
+             "only adds new segments; later runs keep using them",
+    )
+    parser.add_argument(
+        '--export', action='store_true',
+        help=f"merge the segments in {profile.segment_dir}/ into the single "
+             "all-students and qualified CSVs",
+    )
+    parser.add_argument(
+        '--strict', action='store_true',
+        help="report responses that do not match the exam's field schema "
+             "(schema drift); combine with --replay to check a capture",
+    )
+    parser.add_argument(
+        '--discover', action='store_true',
+        help="probe the exam's candidate centers/streams/letters for alive "
+             "blocks and their sequence ceilings, and write the topology file "
+             "later runs use as their keyspace",
+    )
+    parser.add_argument(
+        '--refresh', metavar='PREDICATES', nargs='?', const=REFRESH_DEFAULT,
+        help="re-fetch only the rows of the all-students CSV matching "
+             "PREDICATES (comma-separated: no-rank, pending, stale=DAYS; "
+             f"default {REFRESH_DEFAULT}), update them in place and log the "
+             f"changes to {profile.changes_file}",
+    )
+    parser.add_argument(
+        '--query', metavar='QUERY', nargs='*',
+        help="answer a query from the compact index over the all-students "
+             f"CSV ({profile.index_file}, built or updated first) — see "
+             "the list below",
+    )
+    parser.add_argument(
+        '--recheck', metavar='RATE', type=float, default=RECHECK_RATE,
+        help="full mode: share of the misses cached by earlier runs "
+             f"({profile.miss_cache}) to send anyway, to catch results "
+             f"published late (default {RECHECK_RATE}; 1 re-verifies them all)",
+    )
+    parser.add_argument(
+        '--trace', metavar='RATE', type=float, nargs='?', const=TRACE_RATE,
+        help="time a RATE share of requests phase by phase (DNS, connect, "
+             "server, body, parse) and every local stage, print a summary and "
+             f"write collapsed stacks for a flamegraph to {profile.trace_file} "
+             f"(default RATE {TRACE_RATE})",
+    )
+    parser.add_argument(
+        '--budget', metavar='MINUTES', type=float,
+        help="wall-clock budget: stop sending new tickets shortly before it "
+             "runs out, drain, flush and exit with status "
+             f"{EXIT_PARTIAL} if the keyspace did not finish",
+    )
+    parser.add_argument(
+        '--prioritize', metavar='FILE', nargs='?', const=True,
+        help="full mode: scrape blocks in order of expected yield (hits per "
+             "request) from a prior results CSV, segment store or metrics JSON, "
+             f"densest first (default: the exam's own {profile.segment_dir} or "
+             f"{profile.all_file}; keyspace order if it has neither yet)",
+    )
+    return parser
+
+def main(profile, argv=None):
+    parser = build_arg_parser(profile)
+    args   = parser.parse_args(argv)
+    if args.sqlite and args.segments:
+        parser.error("--sqlite and --segments are different stores; pick one")
+    if args.prioritize not in (None, True) and not os.path.exists(args.prioritize):
+        parser.error(f"--prioritize: {args.prioritize} not found")
+    if args.shard:
+        profile = profile.for_shard(*args.shard)
+    if args.prioritize is True:
+        args.prioritize = prior_results(profile)
+        if args.prioritize is None:
+            print(f"[PRIORITY] No earlier output of {profile.name} yet; blocks "
+                  f"go in keyspace order\n")
+    if args.strict:
+        profile = profile.strict()
+    if args.discover:
+        discover_topology(profile, adaptive=not args.fixed_window)
+    elif args.query is not None:
+        run_query(profile, args.query)
+    elif args.refresh:
+        refresh(profile, args.refresh, sqlite=args.sqlite,
+                adaptive=not args.fixed_window)
+    elif args.export:
+        export_segments(profile)
+    elif args.rank:
+        rank_only(profile, sqlite=args.sqlite)
+    elif args.replay:
+        replay(profile, sqlite=args.sqlite)
+    else:
+        tickets = (read_ticket_file(args.tickets, profile.keyspace())
+                   if args.tickets else None)
+        finished = run_profile(profile, capture=args.capture,
+                               adaptive=not args.fixed_window, tickets=tickets,
+                               sqlite=args.sqlite, prioritize=args.prioritize,
+                               budget=args.budget * 60 if args.budget else None,
+                               recheck=args.recheck, trace=args.trace,
+                               segments=args.segments)
+        if not finished:
+            sys.exit(EXIT_PARTIAL)
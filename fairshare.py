@@ -0,0 +1,123 @@
+import asyncio
+
+from concurrency import AimdController
+
+# ── PER-HOST FAIR SHARE ───────────────────────────────────────────────────────
+# When the orchestrator runs several exams in one process, exams served by the
+# same host (all three exams live on results.manabadi.co.in) draw from one
+# in-flight budget instead of each sizing its own window as if it were alone:
+#
+#   window       the host's limit on requests in flight, sized by one AIMD
+#                controller (or fixed at the limit) — timeouts and 429s
+#                count towards the host's error rate, whichever exam's
+#                request saw them
+#   fair share   window / exams still running on the host; an exam under
+#                its share is admitted whenever the window has room
+#   borrowing    an exam may go above its share while no other exam on the
+#                host is waiting below its own, so a slot an exam cannot use
+#                (its blocks are closing, its retries are backing off, it has
+#                finished) goes to one that can
+#
+# Each exam sees its Lane as its controller: the engine's workers call
+# acquire()/release() and report on_success()/on_failure() exactly as they
+# would to an AimdController. Exams on different hosts never wait for each
+# other.
+
+class HostBudget:
+    """The shared in-flight budget of one host, split fairly between its lanes."""
+
+    def __init__(self, host, limit, adaptive=True):
+        self.host     = host
+        self.limit    = limit
+        self.aimd     = AimdController(limit, name=host) if adaptive else None
+        self.lanes    = []
+        self.inflight = 0
+        self._freed   = asyncio.Event()
+
+    @property
+    def window(self):
+        return self.aimd.window if self.aimd is not None else self.limit
+
+    def lane(self, name):
+        lane = Lane(self, name)
+        self.lanes.append(lane)
+        return lane
+
+    def share(self):
+        """Slots each running exam is guaranteed (at least one)."""
+        running = sum(1 for lane in self.lanes if not lane.finished)
+        return max(1, self.window // max(1, running))
+
+    # ── admission ──
+    def _admits(self, lane):
+        if self.inflight >= self.window:
+            return False
+        share = self.share()
+        if lane.inflight < share:
+            return True
+        return not any(other.waiting and other.inflight < share
+                       for other in self.lanes if other is not lane)
+
+    async def acquire(self, lane):
+        lane.waiting += 1
+        try:
+            while not self._admits(lane):
+                self._freed.clear()
+                await self._freed.wait()
+        finally:
+            lane.waiting -= 1
+        self.inflight += 1
+        lane.inflight += 1
+        self._freed.set()           # a borrower held back for this lane may go now
+
+    def release(self, lane):
+        self.inflight -= 1
+        lane.inflight -= 1
+        lane.sent     += 1
+        self._freed.set()
+
+    def wake(self):
+        self._freed.set()
+
+class Lane:
+    """One exam's view of its HostBudget, used as the engine's controller."""
+
+    def __init__(self, host, name):
+        self.host     = host
+        self.name     = name
+        self.inflight = 0
+        self.waiting  = 0
+        self.sent     = 0
+        self.finished = False
+
+    @property
+    def ceiling(self):
+        return self.host.limit
+
+    @property
+    def window(self):
+        return self.host.share()
+
+    @property
+    def cuts(self):
+        return self.host.aimd.cuts if self.host.aimd is not None else 0
+
+    async def acquire(self):
+        await self.host.acquire(self)
+
+    def release(self):
+        self.host.release(self)
+
+    def on_success(self, latency):
+        if self.host.aimd is not None:
+            self.host.aimd.on_success(latency)
+        self.host.wake()
+
+    def on_failure(self, reason, started):
+        if self.host.aimd is not None:
+            self.host.aimd.on_failure(reason, started)
+
+    def finish(self):
+        """The exam is done; its share goes to the others on the host."""
+        self.finished = True
+        self.host.wake()
@@ -0,0 +1,174 @@
+from bisect import bisect_right
+
+# ── HALL TICKET KEYSPACE ──────────────────────────────────────────────────────
+# Every exam's hall tickets are a fixed prefix (year/center/stream/letter
+# components) followed by a zero-padded sequence number. A Block is one such
+# prefix with its sequence range — one (center, stream) or (cc, letter) run —
+# and is the unit the block scheduler prunes. A Keyspace lays the blocks end
+# to end and maps index ↔ ticket arithmetically, so nothing is materialized.
+
+class Block:
+    """One contiguous run of sequence numbers under a single ticket prefix."""
+
+    def __init__(self, prefix, seq_start, seq_end, width, offset=0):
+        self.prefix    = prefix
+        self.seq_start = seq_start
+        self.seq_end   = seq_end
+        self.width     = width
+        self.offset    = offset     # index of seq_start in the full keyspace
+
+    def __len__(self):
+        return self.seq_end - self.seq_start + 1
+
+    def __repr__(self):
+        return f"Block({self.prefix!r}, {self.seq_start}, {self.seq_end})"
+
+    def ticket(self, seq):
+        return f"{self.prefix}{seq:0{self.width}d}"
+
+    def tickets(self):
+        for seq in range(self.seq_start, self.seq_end + 1):
+            yield self.ticket(seq)
+
+    def clip(self, start, stop):
+        """The part of this block whose keyspace indices fall in [start, stop)."""
+        lo = max(start, self.offset) - self.offset + self.seq_start
+        hi = min(stop, self.offset + len(self)) - self.offset + self.seq_start - 1
+        if lo == self.seq_start and hi == self.seq_end:
+            return self
+        return Block(self.prefix, lo, hi, self.width, self.offset + lo - self.seq_start)
+
+def layout_blocks(blocks):
+    """Assigns each block its keyspace offset, in order. Returns the list."""
+    offset = 0
+    blocks = list(blocks)
+    for block in blocks:
+        block.offset = offset
+        offset      += len(block)
+    return blocks
+
+class _Layout:
+    # Shared, read-only block table behind a Keyspace and all of its views.
+    def __init__(self, blocks):
+        self.blocks    = layout_blocks(blocks)
+        self.offsets   = [b.offset for b in self.blocks]
+        self.by_prefix = {b.prefix: b for b in self.blocks}
+        self.widths    = sorted({b.width for b in self.blocks})
+        sizes          = {len(b) for b in self.blocks}
+        self.uniform   = sizes.pop() if len(sizes) == 1 else None
+        self.total     = sum(len(b) for b in self.blocks)
+
+class Keyspace:
+    """
+    Lazy, ordered view over the tickets of a list of blocks.
+
+    Supports len(), iteration, ks[i] → ticket, ks.index(ticket) → i, ks[a:b]
+    and ks.shard(i, n), all without building a ticket list. Slices and shards
+    are views that keep the parent's indices, so they share one checkpoint
+    bitmap and one numbering with the full keyspace. Index → ticket is a
+    single divmod when every block has the same length (the AP layouts) and a
+    bisect over block offsets otherwise; ticket → index is a dict lookup.
+    """
+
+    def __init__(self, blocks, start=0, stop=None, _layout=None):
+        self._layout = _layout or _Layout(blocks)
+        self.start   = start
+        self.stop    = self._layout.total if stop is None else stop
+
+    # ── sizes ──
+    @property
+    def total(self):
+        """Size of the full keyspace this view belongs to."""
+        return self._layout.total
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __repr__(self):
+        return f"Keyspace([{self.start}:{self.stop}] of {self.total:,})"
+
+    # ── index ↔ ticket ──
+    def _block_at(self, index):
+        layout = self._layout
+        if layout.uniform:
+            return layout.blocks[index // layout.uniform]
+        return layout.blocks[bisect_right(layout.offsets, index) - 1]
+
+    def ticket(self, index):
+        """Ticket at absolute keyspace index `index`."""
+        block = self._block_at(index)
+        return block.ticket(block.seq_start + index - block.offset)
+
+    def index(self, ticket):
+        """Absolute keyspace index of `ticket`; ValueError if it is not here."""
+        for width in self._layout.widths:
+            block = self._layout.by_prefix.get(ticket[:-width])
+            if block is not None and ticket[-width:].isdigit():
+                seq   = int(ticket[-width:])
+                index = block.offset + seq - block.seq_start
+                if block.seq_start <= seq <= block.seq_end and self.start <= index < self.stop:
+                    return index
+        raise ValueError(f"{ticket} is not in {self!r}")
+
+    def prefix(self, ticket):
+        """Prefix of the block `ticket` belongs to, or None if no block has it."""
+        for width in self._layout.widths:
+            if ticket[:-width] in self._layout.by_prefix:
+                return ticket[:-width]
+        return None
+
+    def __contains__(self, ticket):
+        try:
+            self.index(ticket)
+        except ValueError:
+            return False
+        return True
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("Keyspace slices must be contiguous")
+            return Keyspace(None, self.start + start, self.start + max(start, stop), self._layout)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(key)
+        return self.ticket(self.start + key)
+
+    def __iter__(self):
+        for block in self.blocks():
+            yield from block.tickets()
+
+    # ── blocks ──
+    def blocks(self):
+        """Yields this view's blocks, clipped to its range, in order."""
+        if not len(self):
+            return
+        layout = self._layout
+        first  = bisect_right(layout.offsets, self.start) - 1
+        for block in layout.blocks[first:]:
+            if block.offset >= self.stop:
+                break
+            yield block.clip(self.start, self.stop)
+
+    # ── sharding ──
+    def shard(self, i, n):
+        """
+        Shard i of n (0 ≤ i < n) of this view. Boundaries snap to the nearest
+        block start so a block is never split between two runners — splitting
+        one would let each half prune on its own lookahead.
+        """
+        if not 0 <= i < n:
+            raise ValueError(f"shard {i}/{n}: need 0 <= i < n")
+        offsets = [o for o in self._layout.offsets if self.start < o < self.stop]
+
+        def boundary(k):
+            target = self.start + len(self) * k // n
+            if k in (0, n) or not offsets:
+                return target
+            pos  = bisect_right(offsets, target)
+            near = offsets[max(0, pos - 1):pos + 1]
+            return min(near, key=lambda o: abs(o - target))
+
+        return Keyspace(None, boundary(i), max(boundary(i), boundary(i + 1)), self._layout)
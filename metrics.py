@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+# ── LIVE METRICS ──────────────────────────────────────────────────────────────
+# The scrape loop feeds a Metrics object as it goes:
+#
+#   per send    → status (HTTP 200, timeout, HTTP 503, ...), outcome, latency
+#   per ticket  → final outcome, counted against its block (center/stream or
+#                 cc/letter run) for hit density
+#
+# and every METRICS_EVERY seconds a snapshot — counters, a latency histogram
+# for the whole run and for the last interval, in-flight depth, the AIMD
+# window, retries, per-block density — replaces the exam's metrics file
+# atomically (written to a temp file, then renamed), so a reader never sees
+# a half-written file. Run this module to read it:
+#
+#   python metrics.py bipc_metrics.json              # render once
+#   python metrics.py bipc_metrics.json --follow 10  # re-render every 10 s
+#   python metrics.py bipc_metrics.json --prom       # Prometheus text format
+
+METRICS_EVERY   = 10.0                                   # seconds between snapshots
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)   # seconds; +Inf implied
+TOP_BLOCKS      = 10
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus-style upper bounds)."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum    = 0.0
+        self.count  = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+    def since(self, earlier):
+        """Histogram of what was observed after the copy `earlier` was taken."""
+        delta        = Histogram(self.bounds)
+        delta.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+        delta.sum    = self.sum - earlier.sum
+        delta.count  = self.count - earlier.count
+        return delta
+
+    def copy(self):
+        return self.since(Histogram(self.bounds))
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding quantile q (None when empty)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen   = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound if bound != float('inf') else None
+        return None
+
+    def to_dict(self):
+        return {
+            'buckets': list(self.bounds),
+            'counts':  self.counts,
+            'sum':     round(self.sum, 3),
+            'count':   self.count,
+            'p50':     self.quantile(0.50),
+            'p90':     self.quantile(0.90),
+            'p99':     self.quantile(0.99),
+        }
+
+class Metrics:
+    """
+    Instrumentation for one run. `group(htno)` names a ticket's block;
+    `controller`, `retries`, `source` and `writer` are read at snapshot time.
+    """
+
+    def __init__(self, profile, path, planned, group=None, controller=None,
+                 retries=None, source=None, writer=None):
+        self.exam        = profile.name
+        self.path        = path
+        self.planned     = planned
+        self._group      = group
+        self._controller = controller
+        self._retries    = retries
+        self._source     = source
+        self._writer     = writer
+        self.latency     = Histogram()
+        self.statuses    = Counter()
+        self.outcomes    = Counter()
+        self.resolved    = Counter()
+        self.blocks      = {}          # prefix → [tickets resolved, hits]
+        self.inflight    = 0
+        self.peak        = 0
+        self.started     = time.time()
+        self._last       = (time.time(), self.latency.copy(), Counter())
+
+    # ── scrape loop side ──
+    def sending(self):
+        self.inflight += 1
+        if self.inflight > self.peak:
+            self.peak = self.inflight
+
+    def request(self, status, outcome, latency):
+        """One send finished: its status label, outcome and latency in seconds."""
+        self.inflight -= 1
+        self.statuses[status] += 1
+        self.outcomes[outcome] += 1
+        self.latency.observe(latency)
+
+    def ticket(self, htno, outcome, hit):
+        """One ticket resolved (or given up on) with its final outcome."""
+        self.resolved[outcome] += 1
+        if self._group is not None:
+            block = self.blocks.setdefault(self._group(htno) or '?', [0, 0])
+            block[0] += 1
+            block[1] += hit
+
+    # ── snapshots ──
+    def snapshot(self, state='running'):
+        now                     = time.time()
+        then, latency, outcomes = self._last
+        self._last              = (now, self.latency.copy(), self.outcomes.copy())
+        recent                  = self.latency.since(latency)
+        recent_outcomes         = self.outcomes - outcomes
+        interval                = max(now - then, 1e-9)
+
+        sends    = sum(recent_outcomes.values())
+        failed   = recent_outcomes['error'] + recent_outcomes['blocked']
+        resolved = sum(self.resolved.values())
+        elapsed  = now - self.started
+        window   = self._controller.window if self._controller is not None else None
+        return {
+            'exam':      self.exam,
+            'state':     state,
+            'updated':   time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now)),
+            'elapsed':   round(elapsed, 1),
+            'planned':   self.planned,
+            'resolved':  resolved,
+            'found':     self.resolved['hit'],
+            'skipped':   getattr(self._source, 'skipped', 0),
+            'rate':      round(resolved / elapsed, 2) if elapsed else 0.0,
+            'inflight':  self.inflight,
+            'peak':      self.peak,
+            'window':    window,
+            'retries':   self._retries.retries if self._retries is not None else 0,
+            'stalls':    self._writer.stalls if self._writer is not None else 0,
+            'outcomes':  dict(self.outcomes),
+            'tickets':   dict(self.resolved),
+            'statuses':  dict(self.statuses),
+            'latency':   self.latency.to_dict(),
+            'recent': {
+                'seconds':    round(interval, 1),
+                'sends':      sends,
+                'rate':       round(sends / interval, 2),
+                'error_rate': round(failed / sends, 4) if sends else 0.0,
+                'latency':    recent.to_dict(),
+            },
+            'blocks': {prefix: counts for prefix, counts in sorted(self.blocks.items())},
+        }
+
+    async def write(self, state='running'):
+        """Replaces the metrics file with a fresh snapshot, off the event loop."""
+        text = json.dumps(self.snapshot(state))
+        await asyncio.to_thread(write_atomic, self.path, text)
+
+    async def run(self, every=None):
+        """Writes a snapshot every `every` (METRICS_EVERY) seconds until cancelled."""
+        while True:
+            await asyncio.sleep(every or METRICS_EVERY)
+            await self.write()
+
+def write_atomic(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+# ── RENDERING ─────────────────────────────────────────────────────────────────
+def _ms(seconds):
+    return '—' if seconds is None else f"≤{seconds * 1000:,.0f} ms"
+
+def render(snap):
+    """Human-readable summary of one snapshot."""
+    lines  = []
+    window = '—' if snap['window'] is None else snap['window']
+    done   = snap['resolved'] + snap['skipped']
+    pct    = 100 * done / snap['planned'] if snap['planned'] else 100.0
+    lines.append(f"{snap['exam']} — {snap['state']} — updated {snap['updated']} "
+                 f"({snap['elapsed'] / 60:.1f} min in)")
+    lines.append(f"  Progress    : {done:,} of {snap['planned']:,} tickets ({pct:.1f}%), "
+                 f"{snap['found']:,} found, {snap['skipped']:,} pruned")
+    lines.append(f"  Throughput  : {snap['rate']:.1f} tickets/s overall, "
+                 f"{snap['recent']['rate']:.1f} sends/s in the last {snap['recent']['seconds']:.0f} s")
+    lines.append(f"  In flight   : {snap['inflight']} (peak {snap['peak']}), window {window}")
+    lines.append(f"  Errors      : {snap['recent']['error_rate']:.1%} of recent sends, "
+                 f"{snap['retries']:,} retries, writer stalls {snap['stalls']}")
+    for label, hist in (('Latency', snap['latency']), ('  recent', snap['recent']['latency'])):
+        lines.append(f"  {label:<12}: p50 {_ms(hist['p50'])}  p90 {_ms(hist['p90'])}  "
+                     f"p99 {_ms(hist['p99'])}  ({hist['count']:,} sends)")
+    statuses = ', '.join(f"{k} {v:,}" for k, v in sorted(snap['statuses'].items(),
+                                                         key=lambda kv: -kv[1]))
+    lines.append(f"  Statuses    : {statuses or '—'}")
+    tickets = ', '.join(f"{k} {v:,}" for k, v in sorted(snap['tickets'].items()))
+    lines.append(f"  Tickets     : {tickets or '—'}")
+
+    blocks = [(prefix, n, hits) for prefix, (n, hits) in snap['blocks'].items() if n]
+    if blocks:
+        blocks.sort(key=lambda b: (-b[2] / b[1], b[0]))
+        lines.append(f"\n  {'Block':<14} {'Tickets':>8} {'Hits':>7} {'Density':>8}")
+        shown = blocks if len(blocks) <= 2 * TOP_BLOCKS else \
+            blocks[:TOP_BLOCKS] + [None] + blocks[-TOP_BLOCKS:]
+        for block in shown:
+            if block is None:
+                lines.append("  …")
+                continue
+            prefix, n, hits = block
+            lines.append(f"  {prefix:<14} {n:>8,} {hits:>7,} {hits / n:>8.1%}")
+    return '\n'.join(lines)
+
+def to_prometheus(snap):
+    """The snapshot in the Prometheus text exposition format."""
+    exam  = snap['exam'].replace('"', '')
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP scraper_{name} {help_text}")
+        lines.append(f"# TYPE scraper_{name} {kind}")
+        for labels, value in samples:
+            labels = ','.join([f'exam="{exam}"'] + [f'{k}="{v}"' for k, v in labels])
+            lines.append(f"scraper_{name}{{{labels}}} {value}")
+
+    metric('tickets_planned', 'gauge', "Tickets planned for this run.", [((), snap['planned'])])
+    metric('tickets_total', 'counter', "Tickets resolved, by final outcome.",
+           [((('outcome', k),), v) for k, v in sorted(snap['tickets'].items())])
+    metric('sends_total', 'counter', "Requests sent, by outcome.",
+           [((('outcome', k),), v) for k, v in sorted(snap['outcomes'].items())])
+    metric('responses_total', 'counter', "Requests sent, by status.",
+           [((('status', k),), v) for k, v in sorted(snap['statuses'].items())])
+    metric('inflight', 'gauge', "Requests in flight.", [((), snap['inflight'])])
+    if snap['window'] is not None:
+        metric('window', 'gauge', "Adaptive concurrency window.", [((), snap['window'])])
+    metric('retries_total', 'counter', "Retried sends.", [((), snap['retries'])])
+
+    hist, cumulative = snap['latency'], 0
+    lines.append("# HELP scraper_latency_seconds Request latency.")
+    lines.append("# TYPE scraper_latency_seconds histogram")
+    for bound, count in zip(hist['buckets'] + ['+Inf'], hist['counts']):
+        cumulative += count
+        lines.append(f'scraper_latency_seconds_bucket{{exam="{exam}",le="{bound}"}} {cumulative}')
+    lines.append(f'scraper_latency_seconds_sum{{exam="{exam}"}} {hist["sum"]}')
+    lines.append(f'scraper_latency_seconds_count{{exam="{exam}"}} {hist["count"]}')
+
+    metric('block_tickets_total', 'counter', "Tickets resolved per block.",
+           [((('block', p),), n) for p, (n, _) in snap['blocks'].items()])
+    metric('block_hits_total', 'counter', "Hits per block.",
+           [((('block', p),), h) for p, (_, h) in snap['blocks'].items()])
+    return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a scraper metrics file")
+    parser.add_argument('path', help="metrics file, e.g. metrics.json or bipc_metrics.json")
+    parser.add_argument('--follow', metavar='SECS', type=float, nargs='?', const=METRICS_EVERY,
+                        help="re-read and re-render every SECS seconds until the run finishes")
+    parser.add_argument('--prom', action='store_true',
+                        help="print the Prometheus text format instead of a summary")
+    args = parser.parse_args(argv)
+
+    while True:
+        try:
+            with open(args.path, encoding='utf-8') as f:
+                snap = json.load(f)
+        except FileNotFoundError:
+            if not args.follow:
+                sys.exit(f"[METRICS] {args.path} not found")
+            snap = None
+        if snap is not None:
+            print(to_prometheus(snap) if args.prom else render(snap), flush=True)
+        if not args.follow or (snap is not None and snap['state'] != 'running'):
+            return
+        time.sleep(args.follow)
+        if not args.prom:
+            print()
+
+if __name__ == "__main__":
+    main()
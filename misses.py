@@ -0,0 +1,97 @@
+import os
+import random
+
+# ── NEGATIVE CACHE ────────────────────────────────────────────────────────────
+# Most requests of a full run confirm again that a hall ticket does not exist.
+# The miss cache remembers every confirmed miss across runs — unlike the
+# checkpoint, which is deleted to start a fresh scrape — so later full runs
+# of the exam skip those tickets instead of sending them:
+#
+#   in memory   one bitmap per block prefix, bit = sequence number
+#   on disk     one line per prefix with its misses as sequence ranges,
+#               "prefix<TAB>1-3,5,9-150", rewritten atomically at the end of
+#               a run
+#
+# A skipped ticket counts as a miss for block pruning, exactly as if it had
+# been sent. Only real misses (a 200 response with no record) are cached;
+# failures never are. To catch results published late, each cached ticket is
+# still sent with probability RECHECK_RATE (--recheck; 1 re-verifies them
+# all); one that now hits leaves the cache and is counted as a late addition.
+
+RECHECK_RATE = 0.02       # share of cached misses sent anyway, to catch late additions
+
+def _encode(bits):
+    ranges, start = [], None
+    for seq in range(len(bits) * 8 + 1):
+        hit = seq < len(bits) * 8 and bits[seq >> 3] & (1 << (seq & 7))
+        if hit and start is None:
+            start = seq
+        elif not hit and start is not None:
+            ranges.append(f"{start}" if seq - 1 == start else f"{start}-{seq - 1}")
+            start = None
+    return ','.join(ranges)
+
+class MissCache:
+    """Confirmed misses of one exam, keyed by (block prefix, sequence number)."""
+
+    def __init__(self, path, recheck=RECHECK_RATE):
+        self.path     = path
+        self.recheck  = recheck
+        self._bits    = {}            # prefix → bytearray bitmap of sequence numbers
+        self.added    = 0
+        self.late     = 0
+        self._salt    = random.random()     # fresh recheck draw per run
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    prefix, ranges = line.rstrip('\n').split('\t')
+                    for part in filter(None, ranges.split(',')):
+                        lo, _, hi = part.partition('-')
+                        for seq in range(int(lo), int(hi or lo) + 1):
+                            self._set(prefix, seq)
+
+    def __len__(self):
+        return sum(int.from_bytes(bits, 'little').bit_count() for bits in self._bits.values())
+
+    def __contains__(self, key):
+        prefix, seq = key
+        bits = self._bits.get(prefix)
+        return (bits is not None and seq >> 3 < len(bits)
+                and bool(bits[seq >> 3] & (1 << (seq & 7))))
+
+    def _set(self, prefix, seq):
+        bits = self._bits.setdefault(prefix, bytearray())
+        if seq >> 3 >= len(bits):
+            bits.extend(bytes((seq >> 3) - len(bits) + 1))
+        bits[seq >> 3] |= 1 << (seq & 7)
+
+    # ── during a run ──
+    def skip(self, prefix, seq):
+        """
+        Whether to skip sending this ticket: a cached miss not drawn for a
+        recheck. The draw is fixed per ticket for the run, so asking twice
+        gives the same answer.
+        """
+        if (prefix, seq) not in self:
+            return False
+        return (hash((self._salt, prefix, seq)) & 0xFFFFFFFF) / 2 ** 32 >= self.recheck
+
+    def add(self, prefix, seq):
+        if (prefix, seq) not in self:
+            self._set(prefix, seq)
+            self.added += 1
+
+    def hit(self, prefix, seq):
+        """A ticket hit: if it was cached as a miss, it is a late addition."""
+        if (prefix, seq) in self:
+            self._bits[prefix][seq >> 3] &= ~(1 << (seq & 7))
+            self.late += 1
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w') as f:
+            for prefix in sorted(self._bits):
+                ranges = _encode(self._bits[prefix])
+                if ranges:
+                    f.write(f"{prefix}\t{ranges}\n")
+        os.replace(tmp, self.path)
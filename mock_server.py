@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import csv
+import os
+import random
+import zlib
+
+from aiohttp import web
+
+# ── LOCAL MOCK RESULTS SERVER ─────────────────────────────────────────────────
+# Stand-in for results.manabadi.co.in that serves the three result endpoints in
+# their real pipe-delimited formats, so throughput changes can be measured
+# locally (see bench.py) instead of against the live site.
+#
+#   python mock_server.py --port 8099 --latency 40 --jitter 15 --error-rate 0.01
+#
+# Records come from the exam's committed output CSV when it exists (e.g.
+# bipc_all_students.csv), otherwise from a deterministic synthetic layout:
+# every (center, stream) or (cc, letter) block holds a hash-derived number of
+# consecutive students from its first sequence number, about half the blocks
+# being empty — roughly what the real keyspace looks like.
+
+INVALID_TEXT  = "Invalid Hall Ticket Number"
+DENIED_TEXT   = "Referral Denied"
+
+# ── RESPONSE FORMATS ──────────────────────────────────────────────────────────
+# Field positions match the SCHEMA of each scraper.
+
+def format_ts(record):
+    # [0] id [1] htno [2] name [3] math [4] physics [5] chemistry
+    # [6] total [7] status [8] rank [9] branch
+    rank = record['Rank'] if record['Rank'] not in (None, '') else '-'
+    return (f"{zlib.crc32(record['Hall Ticket No'].encode()) % 10**7}|"
+            f"{record['Hall Ticket No']}|{record['Name']}|0|0|0|"
+            f"{record['Score']}|{record['Status']}|{rank}|MPC")
+
+def format_ap(record):
+    # [0] htno [1] name [2..6] subject marks [7] score [8] rank [9] status
+    rank = record['Rank'] if record['Rank'] not in (None, '') else '-'
+    return (f"{record['Hall Ticket No']}|{record['Name']}|0|0|0|0|0|"
+            f"{record['Score']}|{rank}|{record['Status']}")
+
+def format_bipc(record):
+    # [0] htno [1] name [2..7] subject marks [8] score [9] rank [10] status
+    return (f"{record['Hall Ticket No']}|{record['Name']}|0|0|0|0|0|0|"
+            f"{record['Score']}|{record['Rank'] or ''}|{record['Status']}")
+
+# ── EXAM DATASETS ─────────────────────────────────────────────────────────────
+class Exam:
+    """One mocked endpoint: its path, response format and student records."""
+
+    def __init__(self, key, path, formatter, seed_csv, blocks,
+                 needs_referer, statuses):
+        self.key           = key
+        self.path          = path
+        self.format        = formatter
+        self.seed_csv      = seed_csv
+        self.needs_referer = needs_referer
+        self._statuses     = statuses
+        self._records      = None
+        self._blocks       = {b.prefix: b for b in blocks}
+        self._widths       = sorted({b.width for b in blocks})
+
+    def load(self):
+        if self._records is None:
+            self._records = {}
+            if os.path.exists(self.seed_csv):
+                with open(self.seed_csv, newline='', encoding='utf-8') as f:
+                    for row in csv.DictReader(f):
+                        self._records[row['Hall Ticket No']] = row
+                print(f"[MOCK] {self.key}: {len(self._records):,} records from {self.seed_csv}")
+            else:
+                print(f"[MOCK] {self.key}: synthetic records ({self.seed_csv} not found)")
+        return self
+
+    def _synthetic(self, htno):
+        for width in self._widths:
+            block = self._blocks.get(htno[:-width])
+            if block is None or not htno[-width:].isdigit():
+                continue
+            h      = zlib.crc32(block.prefix.encode())
+            filled = 0 if h % 2 else h % (len(block) * 3 // 5 + 1)
+            seq    = int(htno[-width:])
+            if not block.seq_start <= seq < block.seq_start + filled:
+                return None
+            rng    = random.Random(htno)
+            score  = round(rng.uniform(5, 160), 4)
+            passed = score >= 40
+            return {
+                'Hall Ticket No': htno,
+                'Name':           f"STUDENT {htno[-6:]}",
+                'Score':          score,
+                'Status':         self._statuses[0 if passed else 1],
+                'Rank':           int((160 - score) * 900) + 1 if passed else None,
+            }
+        return None
+
+    def lookup(self, htno):
+        """The record for `htno`, or None if that ticket does not exist."""
+        if self._records:
+            return self._records.get(htno)
+        return self._synthetic(htno)
+
+def build_exams():
+    # Imported here so the scrapers' constants stay the single source of truth.
+    import ap_scraper
+    import bipc_scraper
+    import scraper
+    return {
+        'ts': Exam(
+            'ts', '/2025/TS/EAMCET/Namewise/TSEAMCETResults2025.aspx', format_ts,
+            scraper.ALL_FILE, scraper.build_blocks(), needs_referer=False,
+            statuses=('QUALIFIED', 'NOT QUALIFIED'),
+        ),
+        'ap': Exam(
+            'ap', '/2025/AP/EAPCET/Namewise/APEAPCETResults2025.aspx', format_ap,
+            ap_scraper.ALL_FILE, ap_scraper.build_blocks(), needs_referer=True,
+            statuses=('Qualified', 'Not Qualified'),
+        ),
+        'bipc': Exam(
+            'bipc', '/2025/AP/EAPCET/Namewise/APEAPCETmResults2025.aspx', format_bipc,
+            bipc_scraper.ALL_FILE, bipc_scraper.build_blocks(), needs_referer=True,
+            statuses=('Qualified', 'Disqualified in EAPCET-2025'),
+        ),
+    }
+
+# ── SERVER ────────────────────────────────────────────────────────────────────
+def build_app(args):
+    exams = build_exams()
+    slots = asyncio.Semaphore(args.max_connections)
+    rng   = random.Random(args.seed)
+
+    def handler(exam):
+        async def handle(request):
+            htno = request.query.get('htno', '')
+            async with slots:
+                delay = max(0.0, rng.gauss(args.latency, args.jitter)) / 1000
+                await asyncio.sleep(delay)
+                if rng.random() < args.error_rate:
+                    return web.Response(status=500, text="Server Error")
+                if exam.needs_referer and not request.headers.get('Referer'):
+                    return web.Response(text=DENIED_TEXT)
+                if rng.random() < args.deny_rate:
+                    return web.Response(text=DENIED_TEXT)
+                record = exam.lookup(htno)
+                if record is None:
+                    return web.Response(text=INVALID_TEXT)
+                return web.Response(text=exam.format(record))
+        return handle
+
+    app = web.Application()
+    for exam in exams.values():
+        app.router.add_get(exam.load().path, handler(exam))
+    return app
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Local mock of the manabadi results endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=40.0,
+                        help="mean response latency in ms (default 40)")
+    parser.add_argument('--jitter', type=float, default=15.0,
+                        help="latency standard deviation in ms (default 15)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="fraction of requests answered with HTTP 500")
+    parser.add_argument('--deny-rate', type=float, default=0.0,
+                        help="fraction of requests answered with 'Referral Denied'")
+    parser.add_argument('--max-connections', type=int, default=200,
+                        help="requests served at once; the rest queue (default 200)")
+    parser.add_argument('--seed', type=int, default=2025)
+    return parser
+
+if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    print(f"[MOCK] Serving on http://{args.host}:{args.port} "
+          f"(latency {args.latency}±{args.jitter} ms, errors {args.error_rate:.1%}, "
+          f"max {args.max_connections} at once)")
+    web.run_app(build_app(args), host=args.host, port=args.port, print=None)
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import copy
+import importlib
+import json
+import sys
+from urllib.parse import urlparse
+
+import engine
+from deadline import EXIT_PARTIAL, Deadline
+from fairshare import HostBudget
+from misses import RECHECK_RATE
+from tracing import TRACE_RATE, Tracer
+
+# ── MULTI-EXAM ORCHESTRATOR ───────────────────────────────────────────────────
+# Runs several exam profiles together in one process and one event loop, each
+# with its own source, store, writer and metrics exactly as its own script
+# would, but with the exams of one host drawing from a shared in-flight budget
+# (see fairshare.py) instead of three scrapers each ramping up against the
+# same server as if it were alone. A host's limit defaults to the largest
+# MAX_CONCURRENT of its exams; --host-limit overrides it.
+#
+#   python orchestrator.py                 # ts, ap and bipc
+#   python orchestrator.py ap bipc --budget 340 --prioritize
+#
+# Every PROGRESS_EVERY seconds it prints one line per exam from the exam's
+# metrics file. Checkpoints, output and metrics files are the exams' usual
+# ones, so any exam can be resumed by its own script and vice versa.
+
+EXAMS = {
+    'ts':   'scraper',
+    'ap':   'ap_scraper',
+    'bipc': 'bipc_scraper',
+}
+PROGRESS_EVERY = 60       # seconds between per-exam progress lines
+
+def load_profiles(names, shard=None):
+    profiles = []
+    for name in names:
+        profile = importlib.import_module(EXAMS[name]).PROFILE
+        profiles.append(profile.for_shard(*shard) if shard else profile)
+    return profiles
+
+def host_of(profile):
+    return urlparse(profile.url).hostname
+
+def plan_hosts(profiles, limits=None, adaptive=True):
+    """{host: HostBudget} for the hosts `profiles` scrape."""
+    groups = {}
+    for profile in profiles:
+        groups.setdefault(host_of(profile), []).append(profile)
+    limits = limits or {}
+    return {
+        host: HostBudget(host, limits.get(host, max(p.max_concurrent for p in group)),
+                         adaptive)
+        for host, group in groups.items()
+    }
+
+def read_metrics(profile):
+    try:
+        with open(profile.metrics_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# ── RUNNING ───────────────────────────────────────────────────────────────────
+async def _run_one(run, deadline):
+    profile, lane, source, planned, total_full, done, store, tracer = run
+    try:
+        return await engine.run_async_scraper(profile, source, planned, total_full, done,
+                                              store=store, deadline=deadline,
+                                              controller=lane, name=profile.name,
+                                              tracer=tracer)
+    finally:
+        lane.finish()
+
+async def _report(runs, every=None):
+    while True:
+        await asyncio.sleep(every or PROGRESS_EVERY)
+        print_progress(runs)
+
+async def _run_all(runs, deadline, every=None):
+    reporter = asyncio.create_task(_report(runs, every))
+    try:
+        return await asyncio.gather(*(_run_one(run, deadline) for run in runs))
+    finally:
+        reporter.cancel()
+
+def run_exams(profiles, limits=None, adaptive=True, sqlite=False, prioritize=False,
+              budget=None, recheck=RECHECK_RATE, trace=None, segments=False):
+    """Scrapes `profiles` together; returns True if every one finished."""
+    deadline = Deadline(budget)
+    hosts    = plan_hosts(profiles, limits, adaptive)
+    runs     = []
+    for profile in profiles:
+        host = hosts[host_of(profile)]
+        # Each exam's worker pool and connection pool must be able to take
+        # the whole host window once the other exams are done.
+        profile = copy.copy(profile)
+        profile.max_concurrent = host.limit
+        print(f"[ALL] ── {profile.name} ──")
+        prior = engine.prior_results(profile) if prioritize else None
+        source, planned, total_full, done = engine.select_tickets(profile, prioritize=prior,
+                                                                  recheck=recheck)
+        runs.append((profile, host.lane(profile.name), source, planned, total_full, done,
+                     engine.open_store(profile, sqlite, segments=segments),
+                     Tracer(trace) if trace else None))
+
+    for host in hosts.values():
+        names = ', '.join(lane.name for lane in host.lanes)
+        print(f"[HOSTS] {host.host}: {names} share {host.limit} requests in flight "
+              f"({'adaptive' if adaptive else 'fixed'} window, fair share "
+              f"{host.share()} each)")
+    print()
+
+    finished = asyncio.run(_run_all(runs, deadline))
+    print_overview(runs, hosts)
+    return all(finished)
+
+# ── PROGRESS ──────────────────────────────────────────────────────────────────
+def print_progress(runs):
+    for profile, lane, *_ in runs:
+        snap = read_metrics(profile)
+        if snap is None:
+            continue
+        done  = snap['resolved'] + snap['skipped']
+        share = done / snap['planned'] if snap['planned'] else 1.0
+        state = ('done' if lane.finished
+                 else f"{lane.inflight} in flight, share {lane.window}")
+        print(f"  [ALL] {profile.name:<12} {share:6.1%} | {snap['resolved']:,} resolved | "
+              f"{snap['found']:,} students | {snap['recent']['rate']:.1f} req/s | {state}")
+
+def print_overview(runs, hosts):
+    print(f"\n{'=' * 65}")
+    print("ALL EXAMS")
+    print(f"{'=' * 65}")
+    print(f"  {'Exam':<12} {'State':<9} {'Resolved':>10} {'Students':>9} "
+          f"{'Requests':>10} {'req/s':>7}")
+    for profile, lane, *_ in runs:
+        snap = read_metrics(profile) or {}
+        print(f"  {profile.name:<12} {snap.get('state', '?'):<9} "
+              f"{snap.get('resolved', 0):>10,} {snap.get('found', 0):>9,} "
+              f"{lane.sent:>10,} {snap.get('rate', 0.0):>7.1f}")
+    for host in hosts.values():
+        backoffs = host.aimd.cuts if host.aimd is not None else 0
+        print(f"\n  {host.host}: final window {host.window} of {host.limit}, "
+              f"{backoffs} backoffs")
+    print(f"{'=' * 65}")
+
+# ── ENTRY POINT ───────────────────────────────────────────────────────────────
+def parse_host_limit(value):
+    host, _, limit = value.partition('=')
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected HOST=N, got {value!r}")
+    if limit < 1:
+        raise argparse.ArgumentTypeError(f"{value}: N must be at least 1")
+    return host, limit
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Scrape several exams in one process, sharing each host's "
+                    "concurrency budget fairly between them",
+    )
+    parser.add_argument(
+        'exams', nargs='*', metavar='EXAM',
+        help=f"exams to run: {', '.join(EXAMS)} (default: all)",
+    )
+    parser.add_argument(
+        '--host-limit', metavar='HOST=N', type=parse_host_limit, action='append',
+        default=[],
+        help="requests in flight allowed to HOST across all its exams (default: "
+             "the largest MAX_CONCURRENT of those exams); repeatable",
+    )
+    parser.add_argument(
+        '--shard', metavar='i/N', type=engine.parse_shard,
+        help="scrape only shard i of N (0-based) of every exam's keyspace",
+    )
+    parser.add_argument(
+        '--fixed-window', action='store_true',
+        help="keep each host at its limit instead of sizing its window "
+             "adaptively (AIMD)",
+    )
+    parser.add_argument(
+        '--sqlite', action='store_true',
+        help="store hits in each exam's SQLite database and export the CSVs from it",
+    )
+    parser.add_argument(
+        '--segments', action='store_true',
+        help="append each exam's hits to its segment store (compressed, "
+             "immutable segments plus a manifest)",
+    )
+    parser.add_argument(
+        '--prioritize', action='store_true',
+        help="full mode: scrape each exam's blocks densest first, from its "
+             "segment store or all-students CSV where it has one",
+    )
+    parser.add_argument(
+        '--recheck', metavar='RATE', type=float, default=RECHECK_RATE,
+        help=f"full mode: share of cached misses to send anyway (default {RECHECK_RATE})",
+    )
+    parser.add_argument(
+        '--trace', metavar='RATE', type=float, nargs='?', const=TRACE_RATE,
+        help="trace a RATE share of every exam's requests phase by phase "
+             f"into its trace file (default RATE {TRACE_RATE})",
+    )
+    parser.add_argument(
+        '--budget', metavar='MINUTES', type=float,
+        help="wall-clock budget for all exams together: stop sending new "
+             "tickets shortly before it runs out, flush and exit with status "
+             f"{EXIT_PARTIAL} if any exam did not finish",
+    )
+    return parser
+
+def main(argv=None):
+    parser = build_arg_parser()
+    args   = parser.parse_args(argv)
+    names  = list(dict.fromkeys(args.exams or EXAMS))
+    for name in names:
+        if name not in EXAMS:
+            parser.error(f"unknown exam {name!r} (choose from {', '.join(EXAMS)})")
+    if args.sqlite and args.segments:
+        parser.error("--sqlite and --segments are different stores; pick one")
+    finished = run_exams(load_profiles(names, args.shard), dict(args.host_limit),
+                         adaptive=not args.fixed_window, sqlite=args.sqlite,
+                         prioritize=args.prioritize,
+                         budget=args.budget * 60 if args.budget else None,
+                         recheck=args.recheck, trace=args.trace,
+                         segments=args.segments)
+    if not finished:
+        sys.exit(EXIT_PARTIAL)
+
+if __name__ == "__main__":
+    main()
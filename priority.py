@@ -0,0 +1,95 @@
+import csv
+import json
+from collections import Counter
+
+from segments import SegmentStore, has_segments
+
+# ── YIELD-PRIORITIZED BLOCK ORDER ─────────────────────────────────────────────
+# By default blocks are scraped in keyspace order, so a run cut off by the
+# workflow timeout holds an arbitrary prefix of centers. With prior hit
+# statistics the blocks are reordered by expected yield — hits per request —
+# so the densest blocks go first, and a time-boxed run captures the most
+# students per request. The order only changes which block is opened next;
+# keyspace indices, checkpoints and pruning are unaffected.
+#
+# Statistics come from
+#   - a results CSV (an earlier or partial run's all-students file): hits per
+#     block, and the cost of a block is estimated as its requests up to the
+#     last prior hit plus the miss-run lookahead that pruning will spend;
+#   - a segment store (segments.py), read the same way;
+#   - a metrics JSON (metrics.py, e.g. of the run being resumed): tickets and
+#     hits actually seen per block.
+# Blocks with no prior hits keep their keyspace order, after all the others.
+
+def stats_from_tickets(tickets, keyspace, miss_run=None):
+    """{prefix: (expected hits, expected requests)} from earlier hit tickets."""
+    hits     = Counter()
+    last_seq = {}
+    for htno in tickets:
+        prefix = keyspace.prefix(htno)
+        if prefix is None:
+            continue
+        seq              = int(htno[len(prefix):])
+        hits[prefix]    += 1
+        last_seq[prefix] = max(last_seq.get(prefix, 0), seq)
+
+    stats = {}
+    for block in keyspace.blocks():
+        if block.prefix not in hits:
+            continue
+        cost = len(block)
+        if miss_run is not None:
+            cost = min(cost, last_seq[block.prefix] - block.seq_start + 1 + miss_run)
+        stats[block.prefix] = (hits[block.prefix], max(cost, 1))
+    return stats
+
+def stats_from_csv(path, keyspace, miss_run=None):
+    """stats_from_tickets() of a results CSV."""
+    with open(path, newline='', encoding='utf-8') as f:
+        return stats_from_tickets((row['Hall Ticket No'] for row in csv.DictReader(f)),
+                                  keyspace, miss_run)
+
+def stats_from_segments(path, keyspace, miss_run=None):
+    """stats_from_tickets() of a segment store (each ticket once, however often refreshed)."""
+    return stats_from_tickets(SegmentStore.existing(path).tickets(), keyspace, miss_run)
+
+def stats_from_metrics(path):
+    """{prefix: (hits, tickets)} from a metrics JSON."""
+    with open(path, encoding='utf-8') as f:
+        blocks = json.load(f)['blocks']
+    return {prefix: (hits, tickets) for prefix, (tickets, hits) in blocks.items()
+            if hits and tickets}
+
+def load_stats(path, keyspace, miss_run=None):
+    if path.endswith('.json'):
+        return stats_from_metrics(path)
+    if has_segments(path):
+        return stats_from_segments(path, keyspace, miss_run)
+    return stats_from_csv(path, keyspace, miss_run)
+
+def order_by_yield(blocks, stats):
+    """`blocks` sorted by expected hits per request, densest first (stable)."""
+    def density(block):
+        hits, cost = stats.get(block.prefix, (0, 1))
+        return hits / cost
+    return sorted(blocks, key=density, reverse=True)
+
+def yield_curve(blocks, stats, miss_run=None, points=(0.25, 0.5, 0.75)):
+    """
+    Expected share of hits captured after each share of requests in
+    `points`, for blocks in the given order. Blocks without statistics add
+    requests (the lookahead pruning spends on them) but no hits.
+    """
+    def empty_cost(block):
+        return len(block) if miss_run is None else min(len(block), miss_run)
+    costs = [stats[b.prefix][1] if b.prefix in stats else empty_cost(b) for b in blocks]
+    hits  = [stats[b.prefix][0] if b.prefix in stats else 0 for b in blocks]
+    total_cost, total_hits = sum(costs), sum(hits)
+    curve, spent, found, i = [], 0, 0, 0
+    for point in points:
+        while i < len(blocks) and spent + costs[i] <= point * total_cost:
+            spent += costs[i]
+            found += hits[i]
+            i     += 1
+        curve.append((point, found / total_hits if total_hits else 0.0))
+    return curve
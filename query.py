@@ -0,0 +1,352 @@
+import array
+import bisect
+import csv
+import heapq
+import json
+import math
+import os
+import struct
+import time
+import zlib
+
+# ── RESULTS INDEX ─────────────────────────────────────────────────────────────
+# Point, range and percentile queries over an exam's all-students CSV without
+# loading it into a script each time. The index is built once, next to the
+# CSV, as a handful of typed arrays:
+#
+#   columns     ticket (fixed-width bytes), score (NaN = none), rank (0 =
+#               none), qualified flag and CSV byte offset — one entry per row
+#   by_ticket   row ids in hall-ticket order        → ticket lookup
+#   by_rank     ranked row ids in rank order        → rank point/range queries
+#   by_score    scored row ids in score order       → score ranges, percentiles
+#   by_center   row ids by (center, ticket), with the start of each center
+#
+# and every query is a binary search over one of them. Name and Status are
+# read back from the CSV at the row's offset, so the index holds numbers only.
+#
+# During a scrape the CSV only grows by appends. The index records how many
+# bytes of it it covers, and the next query indexes only the rows added since,
+# merging them into the sorted arrays. A CSV rewritten in place (--refresh,
+# the --sqlite export) is re-indexed from scratch. A ticket that appears
+# twice counts once, as its last row.
+
+MAGIC     = b'RIDX'
+VERSION   = 1
+LENGTH    = struct.Struct('<I')
+TAIL      = 4096          # bytes before the indexed end checked for an in-place rewrite
+SHOW_ROWS = 10            # rows listed by a range query
+
+# name → typecode, in file order
+ARRAYS = {
+    'tickets':   'B',
+    'score':     'd',
+    'rank':      'i',
+    'qualified': 'B',
+    'offset':    'q',
+    'live':      'B',
+    'by_ticket': 'I',
+    'by_rank':   'I',
+    'by_score':  'I',
+    'by_center': 'I',
+    'center_at': 'I',
+}
+
+class ResultIndex:
+    """The query index over one all-students CSV (see above)."""
+
+    def __init__(self, csv_path, center, width):
+        self.csv_path = csv_path
+        self.center   = center          # slice of the ticket that is its center
+        self.width    = width
+        self.fields   = None
+        self.covered  = 0               # bytes of the CSV indexed
+        self.inode    = None
+        self.tail_crc = 0
+        self.centers  = []
+        for name, typecode in ARRAYS.items():
+            setattr(self, name, array.array(typecode))
+
+    def __len__(self):
+        return len(self.by_ticket)
+
+    # ── column access ──
+    def ticket(self, i):
+        return self.tickets[i * self.width:(i + 1) * self.width].tobytes().decode().rstrip()
+
+    def center_of(self, i):
+        return self.ticket(i)[self.center]
+
+    def row(self, i):
+        """The CSV row of row id i, as a dict."""
+        with open(self.csv_path, newline='', encoding='utf-8') as f:
+            f.seek(self.offset[i])
+            return dict(zip(self.fields, next(csv.reader([f.readline()]))))
+
+    # ── building ──
+    def _tail_crc(self, f, end):
+        f.seek(max(0, end - TAIL))
+        return zlib.crc32(f.read(end - max(0, end - TAIL)))
+
+    def is_current(self, stat):
+        return self.inode == stat.st_ino and self.covered == stat.st_size
+
+    def extends_to(self, stat):
+        """Whether the CSV is this index's CSV with rows appended since."""
+        if self.inode != stat.st_ino or stat.st_size < self.covered:
+            return False
+        with open(self.csv_path, 'rb') as f:
+            return self._tail_crc(f, self.covered) == self.tail_crc
+
+    def extend(self, qualifies):
+        """Indexes the complete rows appended since the last build; returns how many."""
+        with open(self.csv_path, 'rb') as f:
+            f.seek(self.covered)
+            data = f.read()
+            end  = data.rfind(b'\n') + 1        # a half-written last row waits
+            lines = data[:end].split(b'\n')[:-1]
+            start = self.covered
+            if self.fields is None and lines:
+                self.fields = next(csv.reader([lines[0].decode('utf-8')]))
+                start      += len(lines[0]) + 1
+                lines       = lines[1:]
+            self.covered  += end
+            self.inode     = os.fstat(f.fileno()).st_ino
+            self.tail_crc  = self._tail_crc(f, self.covered)
+
+        ticket_at = {}                      # tickets of this batch → row id
+        first     = len(self.score)
+        offset    = start
+        for line, values in zip(lines, csv.reader(l.decode('utf-8') for l in lines)):
+            row    = dict(zip(self.fields, values))
+            htno   = row['Hall Ticket No']
+            if len(htno) > self.width:
+                raise ValueError(f"ticket {htno} is wider than the index's {self.width}")
+            i    = len(self.score)
+            prev = ticket_at.get(htno)
+            if prev is None:
+                prev = self.by_ticket_no(htno)
+            if prev is not None:
+                self.live[prev] = 0
+            ticket_at[htno] = i
+            self.tickets.frombytes(htno.ljust(self.width).encode())
+            self.score.append(float(row['Score']) if row['Score'] else math.nan)
+            self.rank.append(int(row['Rank']) if row['Rank'] else 0)
+            self.qualified.append(1 if qualifies(row) else 0)
+            self.offset.append(offset)
+            self.live.append(1)
+            offset += len(line) + 1
+
+        added = len(self.score) - first
+        if added:
+            self._merge(range(first, len(self.score)))
+        return added
+
+    def _merge(self, new):
+        # Sorts the new rows and merges them into each sorted array, dropping
+        # rows a later duplicate replaced.
+        live  = self.live
+        new   = [i for i in new if live[i]]
+        sorts = {
+            'by_ticket': (self.ticket, lambda i: True),
+            'by_rank':   (lambda i: (self.rank[i], self.ticket(i)), lambda i: self.rank[i]),
+            'by_score':  (lambda i: self.score[i], lambda i: not math.isnan(self.score[i])),
+            'by_center': (lambda i: (self.center_of(i), self.ticket(i)), lambda i: True),
+        }
+        for name, (key, keep) in sorts.items():
+            old    = (i for i in getattr(self, name) if live[i])
+            merged = heapq.merge(old, sorted(filter(keep, new), key=key), key=key)
+            setattr(self, name, array.array('I', merged))
+
+        self.centers   = []
+        self.center_at = array.array('I')
+        for pos, i in enumerate(self.by_center):
+            code = self.center_of(i)
+            if not self.centers or self.centers[-1] != code:
+                self.centers.append(code)
+                self.center_at.append(pos)
+        self.center_at.append(len(self.by_center))
+
+    # ── file ──
+    def save(self, path):
+        head = json.dumps({
+            'version':  VERSION,
+            'csv':      os.path.basename(self.csv_path),
+            'fields':   self.fields,
+            'covered':  self.covered,
+            'inode':    self.inode,
+            'tail_crc': self.tail_crc,
+            'width':    self.width,
+            'center':   [self.center.start, self.center.stop],
+            'centers':  self.centers,
+            'lengths':  {name: len(getattr(self, name)) for name in ARRAYS},
+        }).encode()
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + LENGTH.pack(len(head)) + head)
+            for name in ARRAYS:
+                getattr(self, name).tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, csv_path, center):
+        """The index saved at `path`, or None if it is missing or for another layout."""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            head = json.loads(f.read(LENGTH.unpack(f.read(LENGTH.size))[0]))
+            if head['version'] != VERSION or head['center'] != [center.start, center.stop]:
+                return None
+            index = cls(csv_path, center, head['width'])
+            index.fields   = head['fields']
+            index.covered  = head['covered']
+            index.inode    = head['inode']
+            index.tail_crc = head['tail_crc']
+            index.centers  = head['centers']
+            for name, typecode in ARRAYS.items():
+                column = array.array(typecode)
+                column.fromfile(f, head['lengths'][name])
+                setattr(index, name, column)
+        return index
+
+    # ── queries ──
+    def by_ticket_no(self, htno):
+        pos = bisect.bisect_left(self.by_ticket, htno, key=self.ticket)
+        if pos < len(self.by_ticket) and self.ticket(self.by_ticket[pos]) == htno:
+            return self.by_ticket[pos]
+        return None
+
+    def rank_range(self, lo, hi):
+        """Row ids with lo <= rank <= hi, in rank order."""
+        key = lambda i: self.rank[i]
+        a   = bisect.bisect_left(self.by_rank, lo, key=key)
+        b   = bisect.bisect_right(self.by_rank, hi, key=key)
+        return self.by_rank[a:b]
+
+    def score_range(self, lo, hi):
+        """Row ids with lo <= score <= hi, in score order."""
+        key = lambda i: self.score[i]
+        a   = bisect.bisect_left(self.by_score, lo, key=key)
+        b   = bisect.bisect_right(self.by_score, hi, key=key)
+        return self.by_score[a:b]
+
+    def percentile(self, score):
+        """Share of scored students at or below `score`, in percent."""
+        if not self.by_score:
+            return None
+        below = bisect.bisect_right(self.by_score, score, key=lambda i: self.score[i])
+        return 100.0 * below / len(self.by_score)
+
+    def center_rows(self, code):
+        pos = bisect.bisect_left(self.centers, code)
+        if pos == len(self.centers) or self.centers[pos] != code:
+            return self.by_center[:0]
+        return self.by_center[self.center_at[pos]:self.center_at[pos + 1]]
+
+def open_index(profile):
+    """
+    Loads the exam's index and brings it up to date with its all-students
+    CSV: incrementally after appends, from scratch after a rewrite.
+    """
+    if not os.path.exists(profile.all_file):
+        raise SystemExit(f"[QUERY] {profile.all_file} not found")
+    if profile.center is None:
+        raise SystemExit(f"[QUERY] {profile.script} defines no CENTER")
+    stat  = os.stat(profile.all_file)
+    index = ResultIndex.load(profile.index_file, profile.all_file, profile.center)
+    if index is not None and index.is_current(stat):
+        return index
+    start = time.time()
+    if index is None or not index.extends_to(stat):
+        width = max(len(b.ticket(b.seq_start)) for b in profile.keyspace().blocks())
+        index = ResultIndex(profile.all_file, profile.center, width)
+        how   = 'Built'
+    else:
+        how   = 'Updated'
+    added = index.extend(profile.qualifies)
+    index.save(profile.index_file)
+    print(f"[QUERY] {how} {profile.index_file}: +{added:,} rows, {len(index):,} students "
+          f"({time.time() - start:.2f}s)")
+    return index
+
+# ── QUERY CLI ─────────────────────────────────────────────────────────────────
+QUERIES = """queries:
+  ticket HTNO          one student, with the percentile of their score
+  rank R [R2]          the student(s) at rank R, or ranks R..R2
+  score S [S2]         percentile of score S, or the students scoring S..S2
+  center CODE          students, qualified and best rank of one center
+  (none)               build/update the index and print its totals"""
+
+def _row_line(index, i):
+    row = index.row(i)
+    return (f"  {row['Rank'] or '-':<8} {row['Hall Ticket No']:<15} "
+            f"{row['Name'][:30]:<30} {row['Score']:<10} {row['Status'][:40]}")
+
+def _rows(index, ids):
+    print(f"  {'Rank':<8} {'Hall Ticket':<15} {'Name':<30} {'Score':<10} Status")
+    for i in ids[:SHOW_ROWS]:
+        print(_row_line(index, i))
+    if len(ids) > SHOW_ROWS:
+        print(f"  ... {len(ids) - SHOW_ROWS:,} more")
+
+def _range(values, kind):
+    values = [v for v in values if not (isinstance(v, float) and math.isnan(v))]
+    return f"{kind} {min(values):g}–{max(values):g}" if values else f"no {kind}"
+
+def run_query(profile, words):
+    """--query: answers one query (see QUERIES) from the exam's index."""
+    index = open_index(profile)
+    if not words:
+        qualified = sum(index.qualified[i] for i in index.by_ticket)
+        print(f"[QUERY] {len(index):,} students, {qualified:,} qualified, "
+              f"{len(index.by_rank):,} ranked, {len(index.centers):,} centers")
+        return
+    kind, args = words[0], words[1:]
+    start      = time.perf_counter()
+    try:
+        if kind == 'ticket' and len(args) == 1:
+            i = index.by_ticket_no(args[0])
+            if i is None:
+                print(f"[QUERY] {args[0]} not in {profile.all_file}")
+            else:
+                _rows(index, [i])
+                pct = index.percentile(index.score[i])
+                if pct is not None and not math.isnan(index.score[i]):
+                    print(f"  Score percentile: {pct:.2f}")
+        elif kind == 'rank' and len(args) in (1, 2):
+            lo, hi = int(args[0]), int(args[-1])
+            ids    = index.rank_range(lo, hi)
+            if not ids and len(args) == 1:
+                ids = index.rank_range(lo, 2 ** 31 - 1)[:1]
+                print(f"  No rank {lo}" + ("; next ranked student:" if ids else " or higher"))
+            else:
+                print(f"  {len(ids):,} students, {_range([index.score[i] for i in ids], 'score')}")
+            _rows(index, ids)
+        elif kind == 'score' and len(args) == 1:
+            score = float(args[0])
+            pct   = index.percentile(score)
+            if pct is None:
+                print(f"  Score {score:g}: no scored students in {profile.all_file}")
+            else:
+                print(f"  Score {score:g}: percentile {pct:.2f} "
+                      f"({len(index.score_range(score, math.inf)):,} students score "
+                      f"{score:g} or more)")
+        elif kind == 'score' and len(args) == 2:
+            ids    = index.score_range(float(args[0]), float(args[1]))
+            ranked = [index.rank[i] for i in ids if index.rank[i]]
+            print(f"  {len(ids):,} students, {sum(index.qualified[i] for i in ids):,} qualified, "
+                  f"{_range(ranked, 'rank')}")
+            _rows(index, sorted(ids, key=lambda i: -index.score[i]))
+        elif kind == 'center' and len(args) == 1:
+            ids    = index.center_rows(args[0])
+            ranked = sorted((i for i in ids if index.rank[i]), key=lambda i: index.rank[i])
+            print(f"  Center {args[0]}: {len(ids):,} students, "
+                  f"{sum(index.qualified[i] for i in ids):,} qualified, "
+                  f"{_range([index.rank[i] for i in ranked], 'rank')}")
+            _rows(index, ranked)
+        else:
+            raise SystemExit(f"[QUERY] Unknown query: {' '.join(words)}\n{QUERIES}")
+    except ValueError as e:
+        raise SystemExit(f"[QUERY] {e}")
+    print(f"  ({(time.perf_counter() - start) * 1e6:,.0f} µs)")
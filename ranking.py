@@ -0,0 +1,87 @@
+import csv
+import heapq
+import os
+import tempfile
+
+from records import RecordTable
+
+# ── QUALIFIED / RANKED CSV BUILDER ────────────────────────────────────────────
+# Builds the qualified file from the all-students CSV as a separate streaming
+# stage, so the scrape loop keeps no per-hit state and the ranked file can be
+# rebuilt at any time, from a finished or a partial run:
+#
+#   1. stream the all-students CSV, keeping the exam's qualified rows in a
+#      RecordTable (records.py) until it holds RUN_ROWS
+#   2. sort the table by (rank, hall ticket) and spill it to a temporary run
+#      file
+#   3. k-way merge the runs into the qualified file
+#
+# Memory is bounded by one table however many students were found; at a few
+# dozen bytes per row, a whole exam usually fits in a single run. Rows with
+# no rank sort last. A ticket that was appended twice (a hit re-fetched after
+# a crash) sorts next to itself and is written once.
+
+RUN_ROWS = 500_000
+TOP_N    = 10
+
+def rank_key(row):
+    rank = row['Rank']
+    return (int(rank) if rank not in (None, '') else float('inf'), row['Hall Ticket No'])
+
+def _write_run(table, directory, fields):
+    f = tempfile.NamedTemporaryFile('w', dir=directory, suffix='.csv', newline='',
+                                    encoding='utf-8', delete=False)
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        writer.writerows(table.rows(table.by_rank()))
+    return f.name
+
+def _read_run(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+def build_qualified(profile, fields, run_rows=RUN_ROWS):
+    """
+    Rebuilds profile.qualified_file from profile.all_file. Returns
+    (students, qualified, top): rows read, qualified rows written, and the
+    TOP_N best-ranked of those.
+    """
+    students  = 0
+    qualified = 0
+    top       = []
+    out_dir   = os.path.dirname(os.path.abspath(profile.qualified_file))
+
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix='.rank-') as work:
+        runs = []
+        if os.path.exists(profile.all_file):
+            table = RecordTable(fields)
+            with open(profile.all_file, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    students += 1
+                    if profile.qualifies(row):
+                        table.append(row)
+                        if len(table) >= run_rows:
+                            runs.append(_write_run(table, work, fields))
+                            table = RecordTable(fields)
+            if table:
+                runs.append(_write_run(table, work, fields))
+
+        # Write next to the target and rename, so readers never see a
+        # half-written ranked file.
+        tmp = os.path.join(work, 'qualified.csv')
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            last = None
+            for row in heapq.merge(*map(_read_run, runs), key=rank_key):
+                if row['Hall Ticket No'] == last:
+                    continue
+                last = row['Hall Ticket No']
+                writer.writerow(row)
+                qualified += 1
+                if len(top) < TOP_N:
+                    top.append(row)
+        os.replace(tmp, profile.qualified_file)
+
+    return students, qualified, top
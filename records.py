@@ -0,0 +1,120 @@
+import array
+import math
+
+# ── RECORD TABLE ──────────────────────────────────────────────────────────────
+# A hit as a dict costs about a kilobyte: the dict itself plus five string
+# objects, the longest of them a Status such as "Qualified in EAPCET-2025 ,
+# qualifying marks(10+2) not available" repeated for every student it applies
+# to. Wherever many records are held at once — the scrape and replay save
+# buffers, the external sort's runs — they go into a RecordTable instead,
+# one column per field:
+#
+#   ticket   the hall ticket as an integer: decimal for all-digit tickets,
+#            base 36 for ones with letters (TS), so ticket order is integer
+#            order among the tickets of one exam
+#   score    float64, NaN for none
+#   rank     int32, 0 for none
+#   status   uint16 code into a table of the distinct Status strings
+#   name     offsets into one UTF-8 string table
+#
+# about 30 bytes plus the name per record (for tickets of up to 12
+# characters). Records go in and come out as the dicts the rest of the engine
+# uses (Score a float, Rank an int, None when blank), whether they went in
+# from the parser or as CSV text.
+
+FIELDS   = ('Hall Ticket No', 'Name', 'Score', 'Status', 'Rank')
+DIGITS36 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+NO_RANK  = 0
+
+def _base36(value, width):
+    chars = []
+    while value:
+        value, digit = divmod(value, 36)
+        chars.append(DIGITS36[digit])
+    return ''.join(reversed(chars)).rjust(width, '0')
+
+class RecordTable:
+    """Hit records stored column-wise (see above), in insertion order."""
+
+    def __init__(self, fields=FIELDS):
+        self.fields    = fields
+        self.width     = None
+        self.base      = None
+        self.tickets   = array.array('Q')
+        self.scores    = array.array('d')
+        self.ranks     = array.array('i')
+        self.codes     = array.array('H')
+        self.statuses  = []                 # code → Status
+        self._code_of  = {}                 # Status → code
+        self.names     = bytearray()
+        self.name_ends = array.array('I')
+
+    def __len__(self):
+        return len(self.tickets)
+
+    def __bool__(self):
+        return bool(self.tickets)
+
+    def __iter__(self):
+        for i in range(len(self.tickets)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        return dict(zip(self.fields, self.values(i)))
+
+    def values(self, i):
+        """Record i as a tuple in field order."""
+        start = self.name_ends[i - 1] if i else 0
+        score = self.scores[i]
+        return (self.ticket(i),
+                self.names[start:self.name_ends[i]].decode('utf-8'),
+                None if math.isnan(score) else score,
+                self.statuses[self.codes[i]],
+                self.ranks[i] or None)
+
+    def ticket(self, i):
+        if self.base == 10:
+            return f"{self.tickets[i]:0{self.width}d}"
+        return _base36(self.tickets[i], self.width)
+
+    def nbytes(self):
+        """Bytes held by the columns (not counting the Status table)."""
+        return (sum(a.itemsize * len(a) for a in
+                    (self.tickets, self.scores, self.ranks, self.codes, self.name_ends))
+                + len(self.names))
+
+    # ── adding ──
+    def append(self, record):
+        ticket, name, score, status, rank = (record[f] for f in self.fields)
+        if self.width is None:
+            self.width = len(ticket)
+            self.base  = 10 if ticket.isdigit() else 36
+        elif len(ticket) != self.width or (self.base == 10 and not ticket.isdigit()):
+            raise ValueError(f"ticket {ticket!r} does not match the table's "
+                             f"{self.width}-character tickets")
+        code = self._code_of.get(status)
+        if code is None:
+            code = self._code_of[status] = len(self.statuses)
+            self.statuses.append(status)
+        self.tickets.append(int(ticket, self.base))
+        self.scores.append(math.nan if score in (None, '') else float(score))
+        self.ranks.append(NO_RANK if rank in (None, '') else int(rank))
+        self.codes.append(code)
+        self.names += name.encode('utf-8')
+        self.name_ends.append(len(self.names))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    # ── ordering ──
+    def by_rank(self):
+        """Row positions by (rank, hall ticket), unranked rows last."""
+        ranks, tickets = self.ranks, self.tickets
+        keys = [(ranks[i] or math.inf, tickets[i]) for i in range(len(tickets))]
+        return sorted(range(len(tickets)), key=keys.__getitem__)
+
+    def rows(self, order=None):
+        """Field-order tuples of the records, in `order` or insertion order."""
+        for i in (range(len(self.tickets)) if order is None else order):
+            yield self.values(i)
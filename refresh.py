@@ -0,0 +1,107 @@
+import csv
+import os
+import time
+
+# ── INCREMENTAL REFRESH ───────────────────────────────────────────────────────
+# Some results are published unfinished — BIPC's "Qualified in EAPCET-2025 ,
+# qualifying marks(10+2) not available" with no rank, say — and completed
+# later. --refresh re-sends only the tickets of such rows instead of the
+# whole keyspace:
+#
+#   1. select   rows of the all-students CSV matching any of the predicates
+#   2. fetch    those tickets through the engine's normal stream
+#   3. update   rows whose values changed are replaced in place, and each
+#               changed field is appended to the changes file, old and new
+#
+# Predicates, comma-separated (e.g. --refresh no-rank,stale=7):
+#   no-rank    a qualified row with no rank
+#   pending    Status contains one of the exam's pending markers
+#   stale=D    not fetched by a refresh in the last D days; a row never
+#              refreshed counts as stale
+#
+# Every ticket a refresh resolves is appended to the refresh log with the
+# time, which is what stale=D measures. A ticket that now answers with no
+# record keeps its row.
+
+REFRESH_DEFAULT = 'no-rank,pending'
+CHANGE_FIELDS   = ['Refreshed', 'Hall Ticket No', 'Field', 'Old', 'New']
+DAY             = 86400
+
+# ── SELECTION ─────────────────────────────────────────────────────────────────
+def read_log(path):
+    """htno → time of its last refresh, from the refresh log."""
+    fetched = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                htno, when = line.split('\t')
+                fetched[htno] = float(when)
+    return fetched
+
+def predicates(spec, profile):
+    """Returns match(row) for a predicate spec; raises ValueError on a bad one."""
+    tests = []
+    for name in filter(None, (p.strip() for p in spec.split(','))):
+        key, _, arg = name.partition('=')
+        if key == 'no-rank':
+            tests.append(lambda row: not row['Rank'] and profile.qualifies(row))
+        elif key == 'pending':
+            markers = [m.lower() for m in profile.pending]
+            tests.append(lambda row: any(m in row['Status'].lower() for m in markers))
+        elif key == 'stale':
+            try:
+                cutoff = time.time() - float(arg) * DAY
+            except ValueError:
+                raise ValueError(f"stale needs a number of days, e.g. stale=7 (got {name!r})")
+            fetched = read_log(profile.refresh_log)
+            tests.append(lambda row: fetched.get(row['Hall Ticket No'], 0.0) < cutoff)
+        else:
+            raise ValueError(f"unknown predicate {name!r} (expected no-rank, pending "
+                             f"or stale=DAYS)")
+    if not tests:
+        raise ValueError("no predicates given")
+    return lambda row: any(test(row) for test in tests)
+
+def select_rows(path, match):
+    """Returns ({htno: row} of the matching rows, total rows read)."""
+    rows  = {}
+    total = 0
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            total += 1
+            if match(row):
+                rows.setdefault(row['Hall Ticket No'], row)
+    return rows, total
+
+# ── CHANGES ───────────────────────────────────────────────────────────────────
+def cell(value):
+    # A record value as the CSV writer stores it.
+    return '' if value is None else str(value)
+
+def diff(old, new, fields):
+    """[(field, old, new)] for every field whose value changed."""
+    return [(f, old[f], cell(new[f])) for f in fields if old[f] != cell(new[f])]
+
+def rewrite_csv(path, fields, updates):
+    """Replaces the rows of the tickets in `updates` ({htno: record}) in place."""
+    tmp = f"{path}.tmp"
+    with open(path, newline='', encoding='utf-8') as src, \
+         open(tmp, 'w', newline='', encoding='utf-8') as dst:
+        writer = csv.DictWriter(dst, fieldnames=fields)
+        writer.writeheader()
+        for row in csv.DictReader(src):
+            writer.writerow(updates.get(row['Hall Ticket No'], row))
+    os.replace(tmp, path)
+
+def append_changes(path, stamp, changes):
+    new = not os.path.exists(path)
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(CHANGE_FIELDS)
+        for htno, fields in changes.items():
+            writer.writerows([stamp, htno, field, old, value] for field, old, value in fields)
+
+def append_log(path, tickets, when):
+    with open(path, 'a') as f:
+        f.writelines(f"{htno}\t{when:.0f}\n" for htno in tickets)
@@ -0,0 +1,70 @@
+import random
+
+# ── RETRY POLICY ──────────────────────────────────────────────────────────────
+# A timeout, 5xx, dropped connection or 'Referral Denied' says nothing about
+# whether a ticket exists, so it is never recorded as a miss. The ticket goes
+# back to its source and is re-sent after an exponential backoff, until it
+# resolves, runs out of attempts, or the run's retry budget is spent. Tickets
+# given up on are reported as unresolved and can be re-run with --tickets.
+
+RETRY_ATTEMPTS = 5        # sends per ticket, including the first
+RETRY_BASE     = 2.0      # seconds before the first retry; doubles each time
+RETRY_CAP      = 60.0     # longest backoff between two sends of a ticket
+RETRY_RATIO    = 0.1      # retries may add at most this fraction of tickets…
+RETRY_FLOOR    = 200      # …plus this many, so a short run can still retry
+
+class RetryPolicy:
+    """
+    Decides, for each failed send, whether and when to try the ticket again.
+
+    `backoff(htno, outcome)` returns the delay in seconds before the next
+    send, with jitter so a burst of failures is not retried in lock-step, or
+    None once the ticket is out of attempts or the budget is spent — it is
+    then listed in `unresolved` as htno → (last outcome, sends).
+    `resolved(htno)` is called for every hit or miss. After stop() every
+    failure is final, and abandon() lists the tickets still waiting for a
+    retry as unresolved.
+    """
+
+    def __init__(self, attempts=RETRY_ATTEMPTS, base=RETRY_BASE, cap=RETRY_CAP,
+                 ratio=RETRY_RATIO, floor=RETRY_FLOOR):
+        self.attempts   = attempts
+        self.base       = base
+        self.cap        = cap
+        self.ratio      = ratio
+        self.floor      = floor
+        self.tickets    = 0
+        self.retries    = 0
+        self.unresolved = {}
+        self.stopped    = False
+        self._failures  = {}      # htno → (failed sends, last outcome)
+
+    def _first_send(self, htno):
+        if htno not in self._failures:
+            self.tickets += 1
+
+    def resolved(self, htno):
+        self._first_send(htno)
+        self._failures.pop(htno, None)
+
+    def backoff(self, htno, outcome):
+        self._first_send(htno)
+        failures = self._failures.pop(htno, (0, None))[0] + 1
+        budget   = self.floor + self.ratio * self.tickets
+        if self.stopped or failures >= self.attempts or self.retries >= budget:
+            self.unresolved[htno] = (outcome, failures)
+            return None
+        self._failures[htno] = (failures, outcome)
+        self.retries        += 1
+        delay = min(self.cap, self.base * 2 ** (failures - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def stop(self):
+        """No more retries: from now on backoff() always gives up."""
+        self.stopped = True
+
+    def abandon(self):
+        """Lists every ticket still waiting for a retry as unresolved."""
+        for htno, (failures, outcome) in self._failures.items():
+            self.unresolved[htno] = (outcome, failures)
+        self._failures = {}
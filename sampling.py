@@ -0,0 +1,144 @@
+import bisect
+import itertools
+import math
+import random
+
+from scheduler import TicketFeed
+
+# ── STRATIFIED SAMPLE ─────────────────────────────────────────────────────────
+# Sample mode exists to answer "how big is the full run?" before committing
+# hours to it, so the sample has to look like the whole keyspace. It is drawn
+# per stratum:
+#
+#   group   SAMPLE_GROUPS runs of consecutive blocks (centers/streams or
+#           cc/letters, in keyspace order) of about equal ticket count
+#   band    SAMPLE_BANDS equal slices of each block's sequence range — hits
+#           thin out towards the end of a block, so position matters
+#
+# with tickets allocated to strata in proportion to their size (at least 2
+# each) and drawn uniformly at random, without replacement, inside each.
+# From the hits per stratum it estimates:
+#
+#   students    Σ N_h·p_h, with a 95% confidence interval from the stratified
+#               variance Σ N_h²·(1 − n_h/N_h)·p_h(1 − p_h)/(n_h − 1)
+#   requests    what a full run with MISS_RUN pruning will send: each block
+#               is walked once with every ticket a hit at its stratum's rate
+#   wall time   requests at the throughput the sample run measured
+#
+# The request estimate treats tickets within a stratum as independent. Real
+# blocks are dense and then empty, and whole blocks are dead, which closes
+# them sooner than independent hits would — read it as an upper bound.
+
+SAMPLE_GROUPS   = 20      # runs of consecutive blocks
+SAMPLE_BANDS    = 10      # slices of each block's sequence range
+MIN_PER_STRATUM = 2       # fewest draws per stratum (a variance needs two)
+Z95             = 1.96
+JOB_MINUTES     = 340     # the workflows' --budget, for the runner count
+
+class StratifiedSample(TicketFeed):
+    """
+    A stratified random sample of `keyspace`, fed like any TicketFeed; it
+    counts the hits of each stratum as they land and estimate() turns them
+    into full-run figures.
+    """
+
+    def __init__(self, keyspace, size, groups=SAMPLE_GROUPS, bands=SAMPLE_BANDS, seed=None):
+        rng        = random.Random(seed)
+        blocks     = list(keyspace.blocks())
+        self.total = sum(len(b) for b in blocks)
+        self.bands = bands
+        self._walk = []             # (block, group) in keyspace order
+
+        # group → band → [(block, seq_lo, seq_hi)]
+        strata = {}
+        share  = self.total / max(1, min(groups, len(blocks)))
+        seen   = 0
+        for block in blocks:
+            group = min(groups - 1, int(seen / share))
+            seen += len(block)
+            self._walk.append((block, group))
+            for band in range(bands):
+                lo, hi = self._band_range(block, band)
+                if lo <= hi:
+                    strata.setdefault((group, band), []).append((block, lo, hi))
+
+        self.strata = {}            # (group, band) → [population, drawn, sent, hits]
+        self._of    = {}            # ticket → stratum
+        tickets     = []
+        for key, segments in strata.items():
+            sizes = [hi - lo + 1 for _, lo, hi in segments]
+            ends  = list(itertools.accumulate(sizes))
+            count = ends[-1]
+            want  = min(count, max(MIN_PER_STRATUM, round(size * count / self.total)))
+            for pick in rng.sample(range(count), want):
+                i            = bisect.bisect_right(ends, pick)
+                block, lo, _ = segments[i]
+                htno         = block.ticket(lo + pick - (ends[i] - sizes[i]))
+                self._of[htno] = key
+                tickets.append(htno)
+            self.strata[key] = [count, want, 0, 0]
+        rng.shuffle(tickets)
+        self.tickets = tickets
+        super().__init__(tickets)
+
+    def __len__(self):
+        return len(self.tickets)
+
+    def _band_range(self, block, band):
+        lo = block.seq_start + len(block) * band // self.bands
+        hi = block.seq_start + len(block) * (band + 1) // self.bands - 1
+        return lo, hi
+
+    def record(self, htno, record):
+        stratum     = self.strata[self._of[htno]]
+        stratum[2] += 1
+        if record:
+            stratum[3] += 1
+        super().record(htno, record)
+
+    # ── estimates ──
+    def _rates(self):
+        sent = sum(s[2] for s in self.strata.values())
+        hits = sum(s[3] for s in self.strata.values())
+        overall = hits / sent if sent else 0.0
+        # A stratum whose tickets all failed falls back to the overall rate.
+        return {key: (s[3] / s[2] if s[2] else overall) for key, s in self.strata.items()}
+
+    def estimate(self, rate, miss_run=None, seed=0):
+        """
+        Full-run figures from the hits so far: a dict with 'students',
+        'margin' (95% half-width), 'requests' and 'hours' at `rate` req/s.
+        """
+        rates    = self._rates()
+        students = 0.0
+        variance = 0.0
+        for key, (count, _, sent, _) in self.strata.items():
+            p         = rates[key]
+            students += count * p
+            if sent:
+                variance += (count ** 2 * (1 - sent / count) * p * (1 - p)
+                             / max(1, sent - 1))
+
+        requests = self.total
+        if miss_run is not None:
+            rng      = random.Random(seed)
+            requests = 0
+            for block, group in self._walk:
+                last_hit = block.seq_start - 1
+                for band in range(self.bands):
+                    p      = rates.get((group, band), 0.0)
+                    lo, hi = self._band_range(block, band)
+                    for seq in range(lo, hi + 1):
+                        if seq > last_hit + miss_run:
+                            break
+                        requests += 1
+                        if rng.random() < p:
+                            last_hit = seq
+        return {
+            'students': students,
+            'margin':   Z95 * math.sqrt(variance),
+            'strata':   len(self.strata),
+            'total':    self.total,
+            'requests': requests,
+            'hours':    requests / rate / 3600 if rate else None,
+        }
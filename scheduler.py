@@ -0,0 +1,269 @@
+import asyncio
+from collections import deque
+
+# ── TICKET SOURCES ────────────────────────────────────────────────────────────
+# The engine's workers pull tickets from a source with these methods:
+#   await source.next_ticket()   → next hall ticket to send, or None when done
+#   source.record(htno, record)  → called as soon as that ticket's hit or miss lands
+#   source.defer(htno, delay)    → transient failure; issue htno again after delay
+#   source.give_up(htno)         → never resolved; leave it unfinished
+#   source.take_commit()         → callable that checkpoints the hits recorded
+#                                  so far; run it once their records are on disk
+#   source.close()               → stop issuing; next_ticket() returns None
+# TicketFeed streams a plain iterable. BlockScheduler walks the keyspace block
+# by block, stops probing a block once it has gone dead, and skips the misses
+# a MissCache (misses.py) already knows.
+
+class _Source:
+    """
+    Deferred re-issue shared by both sources. A deferred ticket stays in
+    flight until it is recorded or given up, so the source never reports
+    itself finished while a retry is still waiting for its timer.
+    """
+
+    def __init__(self):
+        self._changed = asyncio.Event()
+        self._retry   = deque()
+        self._pending = []
+        self._done    = None
+        self.closed   = False
+
+    def close(self):
+        # Tickets not issued yet, and deferred ones, stay unfinished (their
+        # bits unset) for a resume; workers stop at their next pull.
+        self.closed = True
+        self._changed.set()
+
+    def take_commit(self):
+        # Snapshot now, mark later: hits recorded after this call belong to
+        # the next batch, whose records are not on disk yet.
+        pending, self._pending = self._pending, []
+        done = self._done
+
+        def commit():
+            if done is not None:
+                for index in pending:
+                    done.mark(index)
+        return commit
+
+    def defer(self, htno, delay):
+        asyncio.get_running_loop().call_later(delay, self._retry_due, htno)
+
+    def _retry_due(self, htno):
+        self._retry.append(htno)
+        self._changed.set()
+
+    async def _wait(self):
+        self._changed.clear()
+        await self._changed.wait()
+
+class TicketFeed(_Source):
+    """
+    Feeds a fixed iterable of tickets, in order, with no pruning.
+
+    With a `done` DoneBitmap and an `index` function (ticket → keyspace
+    index), resolved tickets are checkpointed the same way BlockScheduler
+    does it: misses at once, hits through take_commit().
+    """
+
+    def __init__(self, tickets, done=None, index=None):
+        super().__init__()
+        self._tickets   = iter(tickets)
+        self._inflight  = 0
+        self._exhausted = False
+        self._done      = done
+        self._index     = index
+
+    async def next_ticket(self):
+        while True:
+            if self.closed:
+                return None
+            if self._retry:
+                return self._retry.popleft()
+            if not self._exhausted:
+                htno = next(self._tickets, None)
+                if htno is not None:
+                    self._inflight += 1
+                    return htno
+                self._exhausted = True
+            if not self._inflight:
+                return None
+            await self._wait()
+
+    def record(self, htno, record):
+        self._inflight -= 1
+        if self._done is not None:
+            if record:
+                self._pending.append(self._index(htno))
+            else:
+                self._done.mark(self._index(htno))
+        self._changed.set()
+
+    def give_up(self, htno):
+        self._inflight -= 1
+        self._changed.set()
+
+class _OpenBlock:
+    def __init__(self, block):
+        self.block    = block
+        self.next_seq = block.seq_start
+        self.last_hit = block.seq_start - 1
+        self.inflight = 0
+
+    def index(self, seq):
+        return self.block.offset + seq - self.block.seq_start
+
+class BlockScheduler(_Source):
+    """
+    Issues tickets one block at a time, oldest open block first.
+
+    A block may run at most `miss_run` sequence numbers past its last hit.
+    Once that many consecutive tickets after the last hit have come back as
+    misses the block is closed, and the rest of its range is reported through
+    `on_skip(block, seq_from, seq_to, last_hit)` so it can be audited.
+    `miss_run=None` disables pruning and walks every block to its end.
+
+    With a `misses` MissCache, cached misses are not sent (bar its recheck
+    draw) but resolved on the spot as misses — their bits set, and counted in
+    `cached` — and every miss and hit that lands updates the cache.
+
+    With a `done` DoneBitmap, tickets already resolved by an earlier run are
+    never issued again. Misses and pruned ranges mark their bits at once;
+    hits are held until the callable from take_commit() runs, which the
+    engine does once their records are on disk, so a crash can never leave a
+    done bit for an unsaved hit.
+    Already-done tickets count as hits for the lookahead, so a resumed block
+    is never pruned earlier than the original run would have.
+
+    Because hits can extend a block while its lookahead is still in flight,
+    the scheduler opens the next block only when no open block may issue, and
+    waits for results when there is nothing left to open. A deferred ticket
+    keeps its block open until it resolves; one given up on counts as a hit
+    for the lookahead but is left unset in the bitmap, so a resume retries it.
+    """
+
+    def __init__(self, blocks, miss_run=None, on_skip=None, done=None, misses=None):
+        super().__init__()
+        self._blocks    = iter(blocks)
+        self._open      = deque()
+        self._inflight  = {}
+        self._miss_run  = miss_run
+        self._on_skip   = on_skip
+        self._done      = done
+        self._exhausted = False
+        self.misses     = misses
+        self.skipped    = 0
+        self.cached     = 0
+
+    # ── issuing ──
+    def _can_issue(self, ob):
+        if ob.next_seq > ob.block.seq_end:
+            return False
+        if self._miss_run is None:
+            return True
+        return ob.next_seq <= ob.last_hit + self._miss_run
+
+    def _skip_done(self, ob):
+        if self._done is None:
+            return
+        start = ob.index(ob.next_seq)
+        ahead = self._done.first_unset(start, ob.index(ob.block.seq_end + 1)) - start
+        if ahead:
+            ob.next_seq += ahead
+            ob.last_hit  = ob.next_seq - 1
+
+    def _skip_cached(self, ob):
+        if self.misses is None:
+            return
+        while self._can_issue(ob) and self.misses.skip(ob.block.prefix, ob.next_seq):
+            if self._done is not None:
+                self._done.mark(ob.index(ob.next_seq))
+            ob.next_seq += 1
+            self.cached += 1
+
+    def _advance(self, ob):
+        # Moves next_seq past every ticket that needs no request.
+        while True:
+            seq = ob.next_seq
+            self._skip_done(ob)
+            self._skip_cached(ob)
+            if ob.next_seq == seq:
+                return
+
+    def _issue(self, ob):
+        seq           = ob.next_seq
+        ob.next_seq  += 1
+        ob.inflight  += 1
+        htno          = ob.block.ticket(seq)
+        self._inflight[htno] = (ob, seq)
+        self._advance(ob)
+        return htno
+
+    def _try_issue(self):
+        for ob in self._open:
+            if self._can_issue(ob):
+                return self._issue(ob)
+        while not self._exhausted:
+            block = next(self._blocks, None)
+            if block is None:
+                self._exhausted = True
+                break
+            ob = _OpenBlock(block)
+            self._open.append(ob)
+            self._advance(ob)
+            if self._can_issue(ob):
+                return self._issue(ob)
+            self._close(ob)
+        return None
+
+    async def next_ticket(self):
+        while True:
+            if self.closed:
+                return None
+            if self._retry:
+                return self._retry.popleft()
+            htno = self._try_issue()
+            if htno is not None:
+                return htno
+            if self._exhausted and not self._open:
+                return None
+            await self._wait()
+
+    # ── completion ──
+    def record(self, htno, record):
+        ob, seq = self._inflight.pop(htno)
+        if record:
+            ob.last_hit = max(ob.last_hit, seq)
+            self._pending.append(ob.index(seq))
+        elif self._done is not None:
+            self._done.mark(ob.index(seq))
+        if self.misses is not None:
+            if record:
+                self.misses.hit(ob.block.prefix, seq)
+            else:
+                self.misses.add(ob.block.prefix, seq)
+        self._settle(ob)
+
+    def give_up(self, htno):
+        # Unknown is not a miss: extend the lookahead as a hit would, so a
+        # run of failures can never get a live block pruned.
+        ob, seq     = self._inflight.pop(htno)
+        ob.last_hit = max(ob.last_hit, seq)
+        self._settle(ob)
+
+    def _settle(self, ob):
+        # A hit may have extended the lookahead over cached misses.
+        self._advance(ob)
+        ob.inflight -= 1
+        if ob.inflight == 0 and not self._can_issue(ob):
+            self._close(ob)
+        self._changed.set()
+
+    def _close(self, ob):
+        self._open.remove(ob)
+        if ob.next_seq <= ob.block.seq_end:
+            self.skipped += ob.block.seq_end - ob.next_seq + 1
+            if self._done is not None:
+                self._done.mark_range(ob.index(ob.next_seq), ob.index(ob.block.seq_end + 1))
+            if self._on_skip:
+                self._on_skip(ob.block, ob.next_seq, ob.block.seq_end, ob.last_hit)
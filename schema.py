@@ -0,0 +1,157 @@
+from collections import Counter
+
+# ── RESPONSE SCHEMAS ──────────────────────────────────────────────────────────
+# Every results endpoint answers with one pipe-separated line; only the field
+# positions differ between exams. Each scraper declares its layout as a
+# Schema, and compile() turns it into the exam's parser:
+#
+#   parse(body: bytes) → record dict, or None for no record
+#
+# The parser takes the raw response bytes — no charset sniffing, no
+# aiohttp text() — decodes them once as UTF-8, and is generated as
+# straight-line code for the schema (like collections.namedtuple does): one
+# split, then each needed field indexed, stripped and converted once with
+# the conversion written inline. Only a record with a field the inline form
+# rejects (a score with the site's '…') takes the slow path, where every
+# field goes through its converter function.
+#
+# In strict mode the parser also reports schema drift — a field count other
+# than `width`, or a field its converter rejects — once per kind of drift as
+# a [SCHEMA] line, and counts every occurrence in `parse.drift`.
+
+ELLIPSES = ('…', '...')
+
+# ── FIELD CONVERTERS ──────────────────────────────────────────────────────────
+# Each takes the raw field text and returns the value, or raises ValueError.
+# `inline` is the fast-path expression for the generated parser ({x} is the
+# field, and converters are in scope by name); it may raise ValueError on
+# input the converter itself accepts.
+
+def text(raw):
+    return raw.strip()
+
+def number(raw):
+    """Score: a float, with the site's truncation ellipsis removed; blank → None."""
+    for ellipsis in ELLIPSES:
+        raw = raw.replace(ellipsis, '')
+    raw = raw.strip()
+    return float(raw) if raw else None
+
+def strict_number(raw):
+    """Score for sites that never truncate it: a float; blank is rejected."""
+    return float(raw)
+
+def rank(raw):
+    """Rank: an integer; blank or '-' → None."""
+    raw = raw.strip()
+    if raw.isdigit():
+        return int(raw)
+    if raw in ('', '-'):
+        return None
+    raise ValueError(f"not a rank: {raw[:20]!r}")
+
+def lenient_rank(raw):
+    """Rank: an integer; anything else (e.g. 'NA') → None."""
+    raw = raw.strip()
+    return int(raw) if raw.isdigit() else None
+
+text.inline          = "{x}.strip()"
+number.inline        = "float({x})"
+strict_number.inline = "float({x})"
+rank.inline          = "(int({x}) if {x}.strip().isdigit() else rank({x}))"
+lenient_rank.inline  = "(int({x}) if {x}.strip().isdigit() else None)"
+
+# ── SCHEMA ────────────────────────────────────────────────────────────────────
+class Schema:
+    """
+    One exam's response layout.
+
+    `fields` maps each output column to (position, converter), in output
+    order. `width` is the number of pipe-separated fields the site sends.
+    A line too short to hold every field, a body with no '|', one that
+    contains any of `rejects` (matched as given) or one that starts with any
+    of `reject_prefixes` (in any case, after leading whitespace) is not a
+    record.
+    """
+
+    def __init__(self, width, fields, rejects=(), reject_prefixes=()):
+        self.width           = width
+        self.fields          = fields
+        self.rejects         = tuple(rejects)
+        self.reject_prefixes = tuple(p.lower() for p in reject_prefixes)
+
+    def source(self, strict=False):
+        """Python source of the generated parser (see compile())."""
+        needed = max(index for index, _ in self.fields.values()) + 1
+        lines  = [
+            "def parse(body):",
+            "    line = body.decode('utf-8', 'replace')",
+            "    if '|' not in line:",
+            "        return None",
+        ]
+        if self.rejects:
+            test = ' or '.join(f"{r!r} in line" for r in self.rejects)
+            lines += [
+                f"    if {test}:",
+                "        return None",
+            ]
+        if self.reject_prefixes:
+            lines += [
+                f"    if line.lstrip().lower().startswith({self.reject_prefixes!r}):",
+                "        return None",
+            ]
+        lines.append("    parts = line.split('|')")
+        if strict:
+            lines += [
+                f"    if len(parts) != {self.width}:",
+                "        width_drift(parts, body)",
+            ]
+        lines += [
+            f"    if len(parts) < {needed}:",
+            "        return None",
+            "    try:",
+            "        return {",
+        ]
+        for i, (name, (index, convert)) in enumerate(self.fields.items()):
+            template = getattr(convert, 'inline', f"convert_{i}({{x}})")
+            lines.append(f"            {name!r}: {template.format(x=f'parts[{index}]')},")
+        lines += [
+            "        }",
+            "    except ValueError:",
+            "        return careful(parts, body)",
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def compile(self, strict=False):
+        names = tuple(self.fields)
+        drift = Counter()
+
+        def report(kind, body):
+            drift[kind] += 1
+            if drift[kind] == 1:
+                print(f"  [SCHEMA] drift: {kind} — e.g. {body[:120]!r}")
+
+        def width_drift(parts, body):
+            report(f"{len(parts)} fields (expected {self.width})", body)
+
+        def careful(parts, body):
+            # Slow path: every field through its converter function.
+            record = {}
+            for name, (index, convert) in self.fields.items():
+                try:
+                    record[name] = convert(parts[index])
+                except ValueError:
+                    if strict:
+                        report(f"{name} rejected by {convert.__name__}()", body)
+                    return None
+            return record
+
+        namespace = {'careful': careful, 'width_drift': width_drift}
+        for i, name in enumerate(names):
+            convert = self.fields[name][1]
+            namespace[f"convert_{i}"]   = convert
+            namespace[convert.__name__] = convert
+        exec(self.source(strict), namespace)
+        parse       = namespace['parse']
+        parse.drift = drift
+        return parse
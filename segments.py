@@ -0,0 +1,216 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections import Counter
+
+from ranking import build_qualified
+
+# ── SEGMENTED OUTPUT ──────────────────────────────────────────────────────────
+# The all-students CSV only ever grows, and a workflow that commits it every
+# hour stores a full new copy of it in the repository each time, so pushes
+# get slower and the repository grows quadratically over a run. With
+# --segments the hits go to a segment store, a directory holding
+#
+#   000001.csv.gz   sealed segments of exactly SEGMENT_ROWS rows, each a
+#                   complete CSV with its header, gzip'd without a timestamp;
+#                   never changed once written
+#   000002.csv      the open segment: hits since the last seal, appended at
+#                   every save point and sealed once it holds SEGMENT_ROWS
+#   manifest.json   the fields, SEGMENT_ROWS, the open segment's name and per
+#                   sealed segment its rows, first and last ticket, bytes and
+#                   sha256
+#
+# Sealing writes the new segment and the new open segment, then replaces the
+# manifest; that rename is the commit point, and files the manifest does not
+# name (left by a crash on either side of it) are removed on open. An hourly
+# push therefore adds the segments sealed in the last hour, the manifest and
+# an open segment of under SEGMENT_ROWS rows, however large the exam's
+# output is.
+#
+# Rows are only ever appended: --refresh appends a changed row again, and
+# merging keeps each ticket at its first position with its last values. The
+# single CSVs are exported at the end of every run and by --export. Once an
+# exam has a segment store every run continues in it, --segments or not.
+
+SEGMENT_ROWS = 10_000
+MANIFEST     = 'manifest.json'
+
+def has_segments(path):
+    return os.path.exists(os.path.join(path, MANIFEST))
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+class SegmentStore:
+    """Output store of sealed, compressed CSV segments plus one open segment."""
+
+    def __init__(self, path, fields, fresh=False, rows=SEGMENT_ROWS):
+        self.path   = path
+        self.fields = list(fields)
+        os.makedirs(path, exist_ok=True)
+        if fresh:
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {'fields': self.fields, 'segment_rows': rows,
+                        'open': self._name(1, ''), 'segments': []}
+            self._write_manifest(manifest)
+        elif manifest['fields'] != self.fields:
+            raise ValueError(f"{path}: segments have fields {manifest['fields']}, "
+                             f"expected {self.fields}")
+        self.manifest = manifest
+        self.rows     = manifest['segment_rows']
+        self._recover()
+        self.open_rows = self._count_open()
+
+    # ── files ──
+    @staticmethod
+    def _name(number, ext):
+        return f"{number:06d}.csv{ext}"
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _read_manifest(self):
+        try:
+            with open(self._file(MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, manifest):
+        _write_atomic(self._file(MANIFEST), json.dumps(manifest, indent=1).encode())
+
+    def _recover(self):
+        keep = {MANIFEST, self.manifest['open'], *(s['name'] for s in self.manifest['segments'])}
+        for name in os.listdir(self.path):
+            if name not in keep:
+                os.remove(self._file(name))
+        if not os.path.exists(self._file(self.manifest['open'])):
+            with open(self._file(self.manifest['open']), 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(self.fields)
+
+    def _count_open(self):
+        with open(self._file(self.manifest['open']), newline='', encoding='utf-8') as f:
+            return sum(1 for _ in csv.reader(f)) - 1
+
+    @classmethod
+    def existing(cls, path):
+        """The store at `path`, with the fields its manifest names."""
+        with open(os.path.join(path, MANIFEST)) as f:
+            return cls(path, json.load(f)['fields'])
+
+    def sealed(self):
+        return sum(s['rows'] for s in self.manifest['segments'])
+
+    # ── writing ──
+    def write(self, records):
+        """Appends a batch of records to the open segment, sealing full ones."""
+        added = 0
+        with open(self._file(self.manifest['open']), 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields)
+            for record in records:
+                writer.writerow(record)
+                added += 1
+        self.open_rows += added
+        while self.open_rows >= self.rows:
+            self._seal()
+
+    def update(self, records):
+        """Appends the new versions of the tickets in `records` ({htno: record})."""
+        self.write(records.values())
+
+    def _seal(self):
+        with open(self._file(self.manifest['open']), newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))[1:]
+        chunk, rest = rows[:self.rows], rows[self.rows:]
+
+        text   = io.StringIO(newline='')
+        writer = csv.writer(text)
+        writer.writerow(self.fields)
+        writer.writerows(chunk)
+        data   = gzip.compress(text.getvalue().encode('utf-8'), mtime=0)
+        number = len(self.manifest['segments']) + 1
+        name   = self._name(number, '.gz')
+        _write_atomic(self._file(name), data)
+
+        opened = self._name(number + 1, '')
+        with open(self._file(opened), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+            writer.writerows(rest)
+
+        old = self.manifest['open']
+        self.manifest['segments'].append({
+            'name':   name,
+            'rows':   len(chunk),
+            'first':  chunk[0][0],
+            'last':   chunk[-1][0],
+            'bytes':  len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+        })
+        self.manifest['open'] = opened
+        self._write_manifest(self.manifest)
+        os.remove(self._file(old))
+        self.open_rows = len(rest)
+
+    # ── reading ──
+    def _lines(self):
+        # Every row of every segment, sealed ones checked against the manifest.
+        for segment in self.manifest['segments']:
+            with open(self._file(segment['name']), 'rb') as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != segment['sha256']:
+                raise ValueError(f"{self.path}/{segment['name']}: checksum does not "
+                                 f"match the manifest")
+            reader = csv.reader(io.StringIO(gzip.decompress(data).decode('utf-8'), newline=''))
+            next(reader)
+            yield from reader
+        with open(self._file(self.manifest['open']), newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader)
+            yield from reader
+
+    def tickets(self):
+        """Every ticket in the store, once."""
+        return {row[0] for row in self._lines()}
+
+    def merge(self, path):
+        """
+        Writes every ticket once, at its first position with its last values,
+        to the CSV at `path`; returns the number of rows.
+        """
+        counts = Counter(row[0] for row in self._lines())
+        latest = {}
+        for row in self._lines():
+            if counts[row[0]] > 1:
+                latest[row[0]] = row
+        rows = 0
+        tmp  = f"{path}.tmp"
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+            for row in self._lines():
+                if row[0] in latest:
+                    row = latest.pop(row[0])
+                elif counts[row[0]] > 1:
+                    continue
+                writer.writerow(row)
+                rows += 1
+        os.replace(tmp, path)
+        return rows
+
+    def export(self, profile):
+        """Merges into the all-students CSV and builds the qualified CSV from it."""
+        self.merge(profile.all_file)
+        return build_qualified(profile, self.fields)
+
+    def close(self):
+        pass
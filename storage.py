@@ -0,0 +1,133 @@
+import csv
+import itertools
+import os
+import sqlite3
+
+# ── SQLITE STORAGE BACKEND ────────────────────────────────────────────────────
+# Optional alternative to appending rows to the all-students CSV (--sqlite).
+# Records are upserted in batches keyed on the hall ticket, so a resume or an
+# overlapping re-run updates rows instead of duplicating them. The CSVs are
+# exported from the database at the end of a run, in the same format as the
+# CSV backend writes them.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    hall_ticket TEXT PRIMARY KEY,
+    name        TEXT,
+    score       REAL,
+    status      TEXT,
+    rank        INTEGER
+);
+CREATE INDEX IF NOT EXISTS students_rank   ON students (rank);
+CREATE INDEX IF NOT EXISTS students_status ON students (status);
+"""
+
+UPSERT = """
+INSERT INTO students (hall_ticket, name, score, status, rank)
+VALUES (:hall_ticket, :name, :score, :status, :rank)
+ON CONFLICT (hall_ticket) DO UPDATE SET
+    name   = excluded.name,
+    score  = excluded.score,
+    status = excluded.status,
+    rank   = excluded.rank
+"""
+
+# CSV column ↔ table column
+COLUMNS = {
+    'Hall Ticket No': 'hall_ticket',
+    'Name':           'name',
+    'Score':          'score',
+    'Status':         'status',
+    'Rank':           'rank',
+}
+
+class SqliteStore:
+    """One exam's students table in a WAL-mode SQLite file."""
+
+    def __init__(self, path, fields):
+        self.path   = path
+        self.fields = fields
+        resuming    = os.path.exists(path)
+        # The run's writer thread does the upserts, the main thread exports.
+        self._db    = sqlite3.connect(path, check_same_thread=False)
+        # WAL: a batch commit is one sequential append, and readers (e.g. a
+        # query while the scrape runs) never block the writer.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        if resuming:
+            print(f"[INIT] Upserting into existing {path} ({self.count():,} students)")
+        else:
+            print(f"[INIT] Created {path}")
+
+    def count(self):
+        return self._db.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+
+    def write(self, records):
+        """Upserts a batch of records in one transaction."""
+        with self._db:
+            self._db.executemany(UPSERT, (
+                {COLUMNS[k]: v for k, v in record.items()} for record in records
+            ))
+
+    def update(self, records):
+        """Replaces the rows of the tickets in `records` ({htno: record})."""
+        self.write(records.values())
+
+    def import_csv(self, path, batch=5000):
+        """Upserts every row of an all-students CSV; returns the row count."""
+        rows = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            while True:
+                chunk = list(itertools.islice(reader, batch))
+                if not chunk:
+                    return rows
+                for row in chunk:
+                    row['Score'] = float(row['Score']) if row['Score'] else None
+                    row['Rank']  = int(row['Rank']) if row['Rank'] else None
+                self.write(chunk)
+                rows += len(chunk)
+
+    def _rows(self, where, order):
+        select = ', '.join(COLUMNS[f] for f in self.fields)
+        query  = f"SELECT {select} FROM students WHERE {where} ORDER BY {order}"
+        for row in self._db.execute(query):
+            yield dict(zip(self.fields, row))
+
+    def export(self, profile, top_n=10):
+        """
+        Writes the all-students CSV (scrape order) and the qualified CSV (by
+        rank through the rank index, unranked last) from the table. Returns
+        (students, qualified, top) like ranking.build_qualified.
+        """
+        students = 0
+        with open(profile.all_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields)
+            writer.writeheader()
+            for row in self._rows('1', 'rowid'):
+                writer.writerow(row)
+                students += 1
+
+        qualified = 0
+        top       = []
+        tmp       = f"{profile.qualified_file}.tmp"
+        ranked    = itertools.chain(
+            self._rows('rank IS NOT NULL', 'rank, hall_ticket'),
+            self._rows('rank IS NULL', 'hall_ticket'),
+        )
+        with open(tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields)
+            writer.writeheader()
+            for row in ranked:
+                if not profile.qualifies(row):
+                    continue
+                writer.writerow(row)
+                qualified += 1
+                if len(top) < top_n:
+                    top.append(row)
+        os.replace(tmp, profile.qualified_file)
+        return students, qualified, top
+
+    def close(self):
+        self._db.close()
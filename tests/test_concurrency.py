@@ -0,0 +1,24 @@
+import random
+import time
+
+from concurrency import AimdController
+
+def _feed(controller, error_rate, responses, seed=0):
+    rng = random.Random(seed)
+    for _ in range(responses):
+        if rng.random() < error_rate:
+            controller.on_failure('HTTP 500', time.monotonic())
+        else:
+            controller.on_success(0.05)
+
+def test_sparse_random_errors_do_not_shrink_the_window():
+    controller = AimdController(100)
+    _feed(controller, 0.01, 20_000)
+    assert controller.cuts == 0
+    assert controller.window == 100
+
+def test_sustained_errors_cut_the_window():
+    controller = AimdController(100)
+    _feed(controller, 0.2, 2_000)
+    assert controller.cuts > 0
+    assert controller.window < 50
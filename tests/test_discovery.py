@@ -0,0 +1,30 @@
+import asyncio
+import csv
+import os
+from collections import defaultdict
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import bipc_scraper
+from discovery import discover
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_ceilings_cover_committed_bipc_results():
+    with open(os.path.join(ROOT, bipc_scraper.ALL_FILE), newline='', encoding='utf-8') as f:
+        students = {row['Hall Ticket No'] for row in csv.DictReader(f)}
+    highest = defaultdict(int)
+    for htno in students:
+        highest[htno[:-4]] = max(highest[htno[:-4]], int(htno[-4:]))
+
+    async def send(tickets):
+        return {t for t in tickets if t in students}, 0
+
+    blocks, _ = asyncio.run(discover(bipc_scraper.build_candidates(), send,
+                                     bipc_scraper.MISS_RUN))
+    ceilings = {b.prefix: b.seq_end for b in blocks}
+    assert set(ceilings) == set(highest)
+    short = {p: (ceilings[p], seq) for p, seq in highest.items() if ceilings[p] < seq}
+    assert not short
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import engine
+from fairshare import HostBudget
+from retry import RetryPolicy
+from scheduler import TicketFeed
+
+def test_lane_waiting_on_a_retry_leaves_the_window_to_the_other(monkeypatch):
+    async def scenario():
+        host     = HostBudget('results.example', 10, adaptive=False)
+        tail     = host.lane('tail')
+        busy     = host.lane('busy')
+        failed   = asyncio.Event()
+        peak     = {'busy': 0, 'tail': 0}
+
+        async def fake_scrape_one(session, profile, htno, capture, controller, metrics, tracer):
+            if htno == 'T1':
+                failed.set()
+                return htno, engine.ERROR, None
+            peak['busy'] = max(peak['busy'], busy.inflight)
+            peak['tail'] = max(peak['tail'], tail.inflight)
+            await asyncio.sleep(0.005)
+            return htno, engine.MISS, None
+
+        monkeypatch.setattr(engine, 'scrape_one', fake_scrape_one)
+
+        async def drain(stream):
+            async for _ in stream:
+                pass
+
+        # The tail lane's only ticket fails and is deferred for a retry that
+        # comes due long after the busy lane is done.
+        retries = RetryPolicy(base=60)
+        waiting = asyncio.create_task(drain(engine.stream_scrape(
+            None, None, TicketFeed(['T1']), controller=tail, retries=retries)))
+        await failed.wait()
+        await drain(engine.stream_scrape(
+            None, None, TicketFeed(f"B{i}" for i in range(300)), controller=busy))
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        return peak
+
+    peak = asyncio.run(scenario())
+    assert peak == {'busy': 10, 'tail': 0}
@@ -0,0 +1,21 @@
+import copy
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import bipc_scraper
+from query import run_query
+
+@pytest.mark.parametrize('rows', [
+    [],
+    ['951496020101,A STUDENT,,"Qualified in EAPCET-2025 , qualifying marks(10+2) not available",'],
+])
+def test_score_query_without_scored_students(tmp_path, capsys, rows):
+    profile            = copy.copy(bipc_scraper.PROFILE)
+    profile.all_file   = str(tmp_path / 'all.csv')
+    profile.index_file = str(tmp_path / 'all.idx')
+    with open(profile.all_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(['Hall Ticket No,Name,Score,Status,Rank'] + rows) + '\n')
+    run_query(profile, ['score', '50'])
+    assert 'no scored students' in capsys.readouterr().out
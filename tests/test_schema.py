@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import bipc_scraper
+import scraper
+
+def baseline_parse(data_str):
+    # scraper.parse_response before the compiled schemas.
+    if '|' not in data_str or data_str.strip().lower().startswith('invalid'):
+        return None
+    parts = data_str.strip().split('|')
+    if len(parts) < 9:
+        return None
+    try:
+        return {
+            'Hall Ticket No': parts[1].strip(),
+            'Name':           parts[2].strip(),
+            'Score':          float(parts[6].strip()),
+            'Status':         parts[7].strip(),
+            'Rank':           int(parts[8].strip()) if parts[8].strip() not in ['-', ''] else None
+        }
+    except (ValueError, IndexError):
+        return None
+
+ROW = "123|2521A01002|A STUDENT|40|41|42|{score}|{status}|{rank}|MPC"
+
+@pytest.mark.parametrize('body', [
+    ROW.format(score='123.5', status='QUALIFIED', rank='17'),
+    ROW.format(score='123.5', status='QUALIFIED', rank='-'),
+    ROW.format(score='', status='QUALIFIED', rank='17'),
+    ROW.format(score='12…', status='QUALIFIED', rank='17'),
+    ROW.format(score='88', status='Invalid marks', rank=''),
+    ROW.format(score='88', status='QUALIFIED', rank='x'),
+    'Invalid Hall Ticket Number',
+    '  InValid|hall|ticket|||||||',
+    'INVALID|2521A01002|A|0|0|0|1|Q|1|MPC',
+    '1|2|3',
+])
+def test_ts_schema_matches_the_baseline_parser(body):
+    assert scraper.PROFILE.parse(body.encode()) == baseline_parse(body)
+
+def baseline_bipc_parse(data_str):
+    # bipc_scraper.parse_response before the compiled schemas.
+    if '|' not in data_str or 'Referral' in data_str:
+        return None
+    parts = data_str.strip().split('|')
+    if len(parts) < 11:
+        return None
+    try:
+        score_str = parts[8].strip().replace('…', '').replace('...', '')
+        rank_str  = parts[9].strip()
+        return {
+            'Hall Ticket No': parts[0].strip(),
+            'Name':           parts[1].strip(),
+            'Score':          float(score_str) if score_str else None,
+            'Status':         parts[10].strip(),
+            'Rank':           int(rank_str) if rank_str.isdigit() else None
+        }
+    except (ValueError, IndexError):
+        return None
+
+BIPC_ROW = "951496020101|A STUDENT|1|2|3|4|5|6|{score}|{rank}|{status}"
+
+@pytest.mark.parametrize('body', [
+    BIPC_ROW.format(score='63.7035', rank='17493', status='Qualified'),
+    BIPC_ROW.format(score='63.7035', rank='NA', status='Qualified'),
+    BIPC_ROW.format(score='63.7035', rank='-', status='Qualified'),
+    BIPC_ROW.format(score='63.7035', rank=' 12 ', status='Qualified'),
+    BIPC_ROW.format(score='', rank='', status='Qualified in EAPCET-2025 , qualifying marks(10+2) not available'),
+    BIPC_ROW.format(score='45.5…', rank='3', status='Qualified'),
+    BIPC_ROW.format(score='x', rank='3', status='Qualified'),
+    'Referral Denied',
+    'Invalid Hall Ticket Number',
+    '951496020101|A|1|2|3',
+])
+def test_bipc_schema_matches_the_baseline_parser(body):
+    assert bipc_scraper.PROFILE.parse(body.encode()) == baseline_bipc_parse(body)
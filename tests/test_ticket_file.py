@@ -0,0 +1,18 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import scraper
+from engine import read_ticket_file
+
+TICKETS = ['2521A01002', '2521A01003']
+
+@pytest.mark.parametrize('lines', [
+    TICKETS,
+    ['Hall Ticket No,Outcome,Attempts'] + [f"{t},error,5" for t in TICKETS],
+    ['htno'] + TICKETS,
+])
+def test_header_is_dropped_and_tickets_kept(tmp_path, lines):
+    path = tmp_path / 'tickets.csv'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    assert read_ticket_file(path, scraper.PROFILE.keyspace()) == TICKETS
@@ -0,0 +1,157 @@
+import random
+import time
+from collections import defaultdict
+
+import aiohttp
+
+# ── REQUEST PHASE TRACING ─────────────────────────────────────────────────────
+# Opt-in (--trace [RATE]) breakdown of where a run's time goes, for when req/s
+# drops and the metrics only say that latency went up. A random RATE share of
+# requests carries a Span through aiohttp's TraceConfig hooks and the engine,
+# which lap it phase by phase:
+#
+#   client      aiohttp's own work before the request needs a connection
+#   pool_wait   waiting for a free pooled connection (the connector limit)
+#   connect     opening a new TCP + TLS connection, less its DNS lookup
+#   dns         resolving the host (cached for DNS_CACHE_TTL)
+#   server      sending the request and waiting for the response headers
+#   body        reading the response body
+#   parse       profile.parse() on the body
+#   failed      from the last phase to a timeout, HTTP error or dropped
+#               connection
+#
+# Local stages are timed on every occurrence, not sampled: `buffer` (a hit
+# appended to the save buffer) and `commit_wait` (the loop waiting to hand a
+# batch to the writer) on the event loop; `store`, `capture` and
+# `checkpoint` on the writer thread. The scrapers have no threaded request
+# path; the writer thread is the only code off the loop.
+#
+# At the end of the run it prints per-phase percentiles and writes the exam's
+# trace file in collapsed-stack format, one "exam;request;outcome;phase µs"
+# line per stack, which flamegraph.pl, inferno or speedscope render directly.
+# Sampled request phases are scaled up by 1/RATE there, so they weigh against
+# the unsampled local stages as they would in the whole run.
+
+TRACE_RATE = 0.01         # share of requests traced with --trace
+PHASES     = ('client', 'pool_wait', 'dns', 'connect', 'server', 'body', 'parse', 'failed')
+STAGES     = ('buffer', 'commit_wait', 'store', 'capture', 'checkpoint')
+
+class Span:
+    """Phase timings of one traced request."""
+
+    __slots__ = ('mark', 'phases')
+
+    def __init__(self):
+        self.mark   = time.perf_counter()
+        self.phases = {}
+
+    def lap(self, phase):
+        """Charges the time since the last lap to `phase`."""
+        now                = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.mark
+        self.mark          = now
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def _frame(name):
+    return name.replace(' ', '_').replace(';', ':')
+
+class Tracer:
+    """Collects sampled request Spans and local stage timings for one run."""
+
+    def __init__(self, rate=TRACE_RATE, seed=None):
+        self.rate     = rate
+        self.requests = 0
+        self.spans    = defaultdict(list)   # outcome → [phases dict]
+        self.stages   = defaultdict(list)   # stage → [seconds]
+        self._rng     = random.Random(seed)
+
+    # ── requests ──
+    def begin(self):
+        """A Span for the next request if it is drawn for tracing, else None."""
+        self.requests += 1
+        return Span() if self._rng.random() < self.rate else None
+
+    def end(self, span, outcome):
+        self.spans[outcome].append(span.phases)
+
+    def config(self):
+        """aiohttp TraceConfig that laps the Span passed as trace_request_ctx."""
+        def lapping(phase):
+            async def hook(session, ctx, params):
+                span = ctx.trace_request_ctx
+                if span is not None:
+                    span.lap(phase)
+            return hook
+
+        config = aiohttp.TraceConfig()
+        config.on_connection_queued_start.append(lapping('client'))
+        config.on_connection_queued_end.append(lapping('pool_wait'))
+        config.on_connection_create_start.append(lapping('client'))
+        config.on_dns_resolvehost_start.append(lapping('connect'))
+        config.on_dns_resolvehost_end.append(lapping('dns'))
+        config.on_connection_create_end.append(lapping('connect'))
+        config.on_connection_reuseconn.append(lapping('client'))
+        config.on_request_end.append(lapping('server'))
+        config.on_request_exception.append(lapping('failed'))
+        return config
+
+    # ── local stages ──
+    def stage(self, name, seconds):
+        """One occurrence of a local stage (safe to call from the writer thread)."""
+        self.stages[name].append(seconds)
+
+    # ── report ──
+    def folded(self, exam):
+        """Collapsed-stack lines, weights in microseconds."""
+        scale = 1 / self.rate if self.rate else 0.0
+        root  = _frame(exam)
+        total = defaultdict(float)
+        for outcome, spans in self.spans.items():
+            for phases in spans:
+                for phase, seconds in phases.items():
+                    total[f"{root};request;{outcome};{phase}"] += seconds * scale
+        for stage, values in self.stages.items():
+            thread = 'loop' if stage in ('buffer', 'commit_wait') else 'writer'
+            total[f"{root};{thread};{stage}"] += sum(values)
+        return [f"{stack} {round(seconds * 1e6)}"
+                for stack, seconds in sorted(total.items()) if seconds >= 5e-7]
+
+    def write(self, path, exam):
+        with open(path, 'w') as f:
+            f.writelines(line + '\n' for line in self.folded(exam))
+
+    def print_summary(self, path=None):
+        traced = sum(len(spans) for spans in self.spans.values())
+        phases = defaultdict(list)
+        for spans in self.spans.values():
+            for span in spans:
+                for phase, seconds in span.items():
+                    phases[phase].append(seconds)
+        grand = sum(sum(values) for values in phases.values()) or 1.0
+
+        print(f"\n  [TRACE] {traced:,} of {self.requests:,} requests traced "
+              f"({self.rate:g} sampled)")
+        if traced:
+            print(f"    {'Phase':<12} {'Samples':>8} {'Mean ms':>9} {'p50':>8} {'p90':>8} "
+                  f"{'p99':>8} {'Share':>7}")
+            for phase in PHASES:
+                values = sorted(phases.get(phase, ()))
+                if not values:
+                    continue
+                print(f"    {phase:<12} {len(values):>8,} {sum(values) / len(values) * 1000:>9.2f} "
+                      f"{_percentile(values, 0.50) * 1000:>8.2f} "
+                      f"{_percentile(values, 0.90) * 1000:>8.2f} "
+                      f"{_percentile(values, 0.99) * 1000:>8.2f} "
+                      f"{sum(values) / grand:>7.1%}")
+            outcomes = ', '.join(f"{len(s):,} {o}" for o, s in sorted(self.spans.items()))
+            print(f"    Traced outcomes: {outcomes}")
+        stages = [(name, self.stages[name]) for name in STAGES if self.stages.get(name)]
+        if stages:
+            print(f"    {'Stage':<12} {'Count':>8} {'Mean ms':>9} {'Max ms':>8} {'Total s':>8}")
+            for name, values in stages:
+                print(f"    {name:<12} {len(values):>8,} {sum(values) / len(values) * 1000:>9.3f} "
+                      f"{max(values) * 1000:>8.2f} {sum(values):>8.2f}")
+        if path:
+            print(f"\n  Saved → {path} (collapsed stacks: flamegraph.pl, inferno, speedscope)")
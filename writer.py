@@ -0,0 +1,108 @@
+import asyncio
+import queue
+import threading
+import time
+
+from capture import FRAME_ENTRIES
+
+# ── WRITER STAGE ──────────────────────────────────────────────────────────────
+# All file I/O of a scrape runs on one background thread, so the event loop —
+# and every request in flight — never waits on the disk. At each save point
+# the scrape loop hands over one group commit:
+#
+#   1. the batch of hit records        → output store (CSV append / upsert)
+#   2. raw bodies captured since       → capture store frames
+#   3. the checkpoint bitmap           → msync
+#
+# and, once that is on disk, the hits of the batch are marked done back on
+# the event loop. A done bit is therefore never set for a record that has not
+# been written, however far behind the disk is. At most WRITER_QUEUE commits
+# wait for the thread; the next save point then waits too, which stops the
+# loop from draining results and so throttles the requests — backpressure
+# instead of unbounded buffering.
+
+WRITER_QUEUE = 4          # group commits waiting for the disk before the loop waits
+
+class Writer:
+    """
+    Background writer for one run. Create it inside the running event loop;
+    it also serves as the capture sink for scrape_one (`add(htno, body)`).
+    With a Tracer, each step of a commit is timed as a local stage.
+    """
+
+    def __init__(self, store, capture=None, done=None, depth=WRITER_QUEUE, tracer=None):
+        self._store   = store
+        self._capture = capture
+        self._done    = done
+        self._depth   = depth
+        self._tracer  = tracer
+        self._frames  = []
+        self._jobs    = queue.Queue()
+        self._slots   = asyncio.Semaphore(depth)
+        self._loop    = asyncio.get_running_loop()
+        self._error   = None
+        self.stalls   = 0
+        self._thread  = threading.Thread(target=self._run, name='writer', daemon=True)
+        self._thread.start()
+
+    # ── event loop side ──
+    def add(self, htno, body):
+        self._frames.append((htno, body))
+
+    async def commit(self, records, on_durable=None):
+        """
+        Queues one group commit of `records` plus everything captured since
+        the last one; `on_durable()` runs on the loop once it is on disk.
+        Waits only when WRITER_QUEUE commits are already queued.
+        """
+        self._raise()
+        if self._slots.locked():
+            self.stalls += 1
+        await self._slots.acquire()
+        frames, self._frames = self._frames, []
+        self._jobs.put((records, frames, on_durable))
+
+    async def close(self):
+        """Writes whatever is queued and stops the thread."""
+        for _ in range(self._depth):
+            await self._slots.acquire()
+        self._jobs.put(None)
+        self._thread.join()
+        self._raise()
+
+    def _raise(self):
+        if self._error is not None:
+            raise RuntimeError("writer thread failed") from self._error
+
+    def _durable(self, on_durable):
+        self._slots.release()
+        if on_durable is not None and self._error is None:
+            on_durable()
+
+    # ── writer thread ──
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            records, frames, on_durable = job
+            try:
+                if self._error is None:
+                    if records:
+                        self._timed('store', self._store.write, records)
+                    if self._capture is not None:
+                        for i in range(0, len(frames), FRAME_ENTRIES):
+                            self._timed('capture', self._capture.write_frame,
+                                        frames[i:i + FRAME_ENTRIES])
+                    if self._done is not None:
+                        self._timed('checkpoint', self._done.flush)
+            except Exception as e:
+                self._error = e
+            self._loop.call_soon_threadsafe(self._durable, on_durable)
+
+    def _timed(self, stage, step, *args):
+        if self._tracer is None:
+            return step(*args)
+        start = time.perf_counter()
+        step(*args)
+        self._tracer.stage(stage, time.perf_counter() - start)